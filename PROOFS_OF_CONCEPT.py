@@ -1,5 +1,7 @@
 import streamlit as st
 
+from greencity import qa_model
+
 # MAIN
 def main():
     st.set_page_config(
@@ -8,6 +10,9 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded")
 
+    # Load the chatbot's question-answering model in the background while visitors read this page
+    qa_model.warm_up()
+
     st.title("Interactive Tools for Sustainable Cities")
     st.markdown("We set out to investigate how digital tools could help improve \
                 (cooperative) decision-making in urban environments by offering accessible \
@@ -0,0 +1,5 @@
+# Shared helpers used by the proof-of-concept pages in pages/.
+#
+# Streamlit puts the folder of the main script on sys.path, so pages can
+# simply `from greencity import ...` when the app is started with
+# `streamlit run PROOFS_OF_CONCEPT.py`.
@@ -0,0 +1,80 @@
+import re
+
+from fuzzywuzzy import fuzz
+
+# Fuzzy lookup of animal names in a question.
+#
+# Every alias (e.g. "gierzwaluw", "swift") is cut into character trigrams and
+# an inverted index maps every trigram to the aliases that contain it. To
+# match a word with a typo, only the aliases sharing trigrams with it are
+# scored with fuzzywuzzy, instead of comparing it with every alias.
+
+MIN_SCORE = 80  # fuzzywuzzy ratio (0-100) needed for a fuzzy match
+MIN_FUZZY_LENGTH = 4  # shorter words only match exactly
+MAX_CANDIDATES = 10  # aliases scored per word, those sharing the most trigrams
+MIN_SHARED = 0.4  # share of trigrams (Dice coefficient) an alias needs before it is scored
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _words(text):
+    return re.findall(r'\w+', text.lower())
+
+
+# Runs of one to max_words consecutive words of the text, longest first
+def word_grams(text, max_words):
+    words = _words(text)
+    for size in range(min(max_words, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            yield ' '.join(words[start:start + size])
+
+
+class AliasIndex:
+    # aliases: dict of alias -> key, e.g. "swift" -> "gierzwaluw"
+    def __init__(self, aliases):
+        self.aliases = {' '.join(_words(alias)): key for alias, key in aliases.items()}
+        self.max_words = max((len(alias.split()) for alias in self.aliases), default=1)
+        self._trigram_counts = {alias: len(trigrams(alias)) for alias in self.aliases}
+        self._trigram_aliases = {}  # trigram -> aliases containing it
+        for alias in self.aliases:
+            for trigram in trigrams(alias):
+                self._trigram_aliases.setdefault(trigram, []).append(alias)
+
+    def __len__(self):
+        return len(self.aliases)
+
+    # Best (score, alias) for a single term, or None when nothing scores MIN_SCORE
+    def fuzzy(self, term, min_score=MIN_SCORE):
+        term_trigrams = trigrams(term)
+        shared = {}
+        for trigram in term_trigrams:
+            for alias in self._trigram_aliases.get(trigram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+        similarity = {alias: 2 * count / (len(term_trigrams) + self._trigram_counts[alias])
+                      for alias, count in shared.items()}
+        candidates = [alias for alias in sorted(similarity, key=similarity.get, reverse=True)[:MAX_CANDIDATES]
+                      if similarity[alias] >= MIN_SHARED]
+        best = max(((fuzz.ratio(term, alias), alias) for alias in candidates), default=None)
+        if best is None or best[0] < min_score:
+            return None
+        return best
+
+    # Key of the animal named in the text, or None. Exact aliases win over
+    # fuzzy matches, and longer names over shorter ones.
+    def find(self, text):
+        grams = list(word_grams(text, self.max_words))
+        for gram in grams:
+            if gram in self.aliases:
+                return self.aliases[gram]
+
+        best = None
+        for gram in grams:
+            if len(gram) < MIN_FUZZY_LENGTH:
+                continue
+            match = self.fuzzy(gram)
+            if match is not None and (best is None or match[0] > best[0]):
+                best = match
+        return self.aliases[best[1]] if best is not None else None
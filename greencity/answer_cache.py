@@ -0,0 +1,61 @@
+import collections
+import threading
+import time
+
+# Bounded cache for chatbot answers, shared by all sessions of the process.
+#
+# Entries are dropped when they are older than `ttl` seconds or, once the
+# cache holds `max_size` entries, when they were used least recently. The
+# counters show how often a question could be answered from the cache.
+
+ANSWER_CACHE_SIZE = 1024
+ANSWER_CACHE_TTL = 24 * 60 * 60
+
+
+class AnswerCache:
+    def __init__(self, max_size=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> (time stored, answer), least recently used first
+
+    def __len__(self):
+        return len(self._entries)
+
+    # The cached answer for the key, or `default` when it is missing or expired
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, answer):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Counters for monitoring: hits, misses, hit rate and number of entries
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,110 @@
+import argparse
+import collections
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from greencity.geometry_store import NEIGHBORHOODS_CSV
+from greencity.scenarios import evaluate
+
+# Evaluate planning scenarios without the dashboard.
+#
+# Reads scenario rows from a CSV file in chunks, evaluates the chunks on a
+# pool of worker processes and appends the results to the output CSV in the
+# input order. Only a few chunks are in memory at any time, so the input can
+# be much larger than memory.
+#
+# Every row needs a `green` column (public green space in %) and either a
+# `population` column or a `neighborhood` column naming an Eindhoven
+# neighborhood. All input columns are copied to the output, followed by
+# housing, aqi, temperature and density.
+#
+# Usage:
+#   python -m greencity.batch_scenarios scenarios.csv results.csv --workers 8
+
+RESULT_COLUMNS = ['housing', 'aqi', 'temperature', 'density']
+
+
+def _neighborhood_population(csv_path):
+    # Only the attribute columns are needed, so skip parsing the polygons
+    df = pd.read_csv(csv_path, usecols=['Neighborhood', 'Population'])
+    return df.set_index('Neighborhood')['Population']
+
+
+def _evaluate_chunk(chunk, population_by_neighborhood):
+    if 'green' not in chunk:
+        raise ValueError("Scenario rows need a 'green' column")
+    # Empty or non-numeric values become NaN, which evaluate() rejects
+    green = pd.to_numeric(chunk['green'], errors='coerce')
+
+    if 'population' in chunk:
+        population = chunk['population']
+    elif 'neighborhood' in chunk:
+        population = chunk['neighborhood'].map(population_by_neighborhood)
+        unknown = chunk.loc[population.isna(), 'neighborhood']
+        if not unknown.empty:
+            raise ValueError(f"Unknown neighborhood: {unknown.iloc[0]}")
+    else:
+        raise ValueError("Scenario rows need a 'population' or 'neighborhood' column")
+
+    results = evaluate(green.to_numpy(), population.to_numpy())
+    return chunk.assign(**results)
+
+
+# Evaluate all scenarios of `input_path` and write them to `output_path`
+def run_batch(input_path, output_path, workers=None, chunk_size=10000,
+              neighborhoods_path=NEIGHBORHOODS_CSV):
+    population_by_neighborhood = _neighborhood_population(neighborhoods_path)
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    pending = collections.deque()
+    rows = 0
+
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor, open(tmp_path, 'w', newline='') as output:
+            def write_next():
+                nonlocal rows
+                result = pending.popleft().result()
+                result.to_csv(output, index=False, header=(rows == 0))
+                rows += len(result)
+
+            try:
+                for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+                    pending.append(executor.submit(_evaluate_chunk, chunk, population_by_neighborhood))
+                    # Keep a bounded number of chunks in flight so memory stays flat
+                    while len(pending) >= max_pending:
+                        write_next()
+                while pending:
+                    write_next()
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate urban planning scenarios from a CSV file.")
+    parser.add_argument('input', help="CSV file with scenario rows")
+    parser.add_argument('output', help="CSV file to write the results to")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="scenario rows per chunk")
+    parser.add_argument('--neighborhoods', default=NEIGHBORHOODS_CSV, help="neighborhoods CSV for population lookups")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = run_batch(args.input, args.output, args.workers, args.chunk_size, args.neighborhoods)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+    print(f"Evaluated {rows} scenarios into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
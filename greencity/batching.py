@@ -0,0 +1,77 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+# Micro-batching for work submitted from many sessions at once.
+#
+# Every session thread submits single items and waits for its own result.
+# One worker thread takes the first waiting item, collects whatever else
+# arrives within `max_wait` seconds (up to `max_batch_size` items) and hands
+# them to `process_batch` together. Under load the model then runs a few
+# large batches instead of many single items competing for the CPU; a lone
+# request waits at most `max_wait` seconds longer.
+
+MAX_BATCH_SIZE = 16
+MAX_WAIT = 0.01
+
+
+class MicroBatcher:
+    # process_batch(items) must return one result per item, in the same order
+    def __init__(self, process_batch, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT, name="micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # Queue one item; the returned Future gets its result or the error of its batch
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    # Process one item with the next batch and wait at most `timeout` seconds for its result
+    def __call__(self, item, timeout=None):
+        future = self.submit(item)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()  # still queued: the worker skips it
+            raise
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            # Skip items whose caller stopped waiting
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.process_batch([item for item, future in batch])
+            except Exception as e:
+                for item, future in batch:
+                    future.set_exception(e)
+                continue
+            results = list(results)
+            if len(results) != len(batch):
+                error = RuntimeError(f"process_batch returned {len(results)} results for {len(batch)} items")
+                for item, future in batch:
+                    future.set_exception(error)
+                continue
+            for (item, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,46 @@
+import threading
+import weakref
+
+# Cache for values derived from a shared object, such as the GeoJSON of the
+# neighborhood polygons or a lookup index over a DataFrame.
+#
+# Values are remembered per object identity and dropped when the object is
+# garbage collected. The shared stores hand out the same object until their
+# source file changes, so derived values are rebuilt automatically after a
+# reload. Builders must not return values that keep a reference to the
+# object itself, otherwise it can never be collected.
+
+_lock = threading.Lock()
+_derived = {}  # id(obj) -> {name: value}
+_building_locks = {}  # (id(obj), name) -> lock held while that value is built
+
+
+def _forget(obj_id):
+    with _lock:
+        _derived.pop(obj_id, None)
+        for key in [key for key in _building_locks if key[0] == obj_id]:
+            del _building_locks[key]
+
+
+# Return build(obj), computing it only once per object and name.
+# Values are built outside the shared lock, so a slow build only makes the
+# threads asking for that same value wait, like greencity.data.load.
+def derived(obj, name, build):
+    with _lock:
+        values = _derived.get(id(obj))
+        if values is None:
+            values = _derived[id(obj)] = {}
+            weakref.finalize(obj, _forget, id(obj))
+        if name in values:
+            return values[name]
+        building_lock = _building_locks.setdefault((id(obj), name), threading.Lock())
+
+    with building_lock:
+        with _lock:
+            if name in values:
+                return values[name]
+        value = build(obj)
+        with _lock:
+            values[name] = value
+            _building_locks.pop((id(obj), name), None)
+        return value
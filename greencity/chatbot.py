@@ -0,0 +1,113 @@
+import re
+
+from greencity import data
+from greencity.alias_index import AliasIndex
+from greencity.answer_cache import AnswerCache
+from greencity.cache import derived
+from greencity.passage_index import PassageIndex
+
+# Document handling for the Animal Information Chatbot
+
+ANIMALS_DOCUMENT = "data/AnimalsTest.txt"
+
+
+# Load the document content
+def load_document(filepath):
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+# Animal name -> section of the document. A dict subclass so answers can be cached per index.
+class AnimalIndex(dict):
+    pass
+
+
+# All names in the header line of a section, Dutch names before their English
+# translation: "Koolmees (Great Tit) and Pimpelmees (Blue Tit)" gives
+# ['koolmees', 'great tit', 'pimpelmees', 'blue tit']
+def header_names(section):
+    header = section.strip().split('\n', 1)[0]
+    names = []
+    for dutch, english in re.findall(r'([^()]+?)\s*\(([^)]+)\)', header):
+        for part in (dutch, english):
+            names.extend(name.strip().lower() for name in re.split(r',|&|\band\b', part) if name.strip())
+    return names
+
+
+# Lowercase (Dutch) animal name from the header of a section, or None when the header names no animal
+def section_name(section):
+    match = re.match(r'^([A-Z][a-zA-Zéëä\s]+)\s?\([^)]+\)', section.strip())
+    if match:
+        return match.group(1).strip().lower()
+    names = header_names(section)
+    return names[0] if names else None
+
+
+# Build an index of animal sections in the document
+def build_document_index(document):
+    sections = re.split(r'\n\n', document)
+    animal_index = AnimalIndex()
+    for section in sections:
+        animal_name = section_name(section)
+        if animal_name:
+            animal_index[animal_name] = section.strip()
+    return animal_index
+
+
+# Build an alias index from the section headers: every Dutch and English name
+# in a header leads to the key of its section in the animal index
+def build_alias_index(document):
+    aliases = {}
+    for section in re.split(r'\n\n', document):
+        animal_name = section_name(section)
+        if animal_name:
+            for name in header_names(section):
+                aliases.setdefault(name, animal_name)
+    return AliasIndex(aliases)
+
+
+# Build a passage index over all sections of the document. Sections are
+# keyed by animal name like in the animal index, or by their header line.
+def build_passage_index(document):
+    sections = [section.strip() for section in re.split(r'\n\n', document) if section.strip()]
+    return PassageIndex((section_name(section) or section.split('\n', 1)[0].lower(), section) for section in sections)
+
+
+def _read_animal_index(path):
+    return build_document_index(load_document(path))
+
+
+# Index of the animal sections, shared by all sessions and rebuilt when the document changes
+def load_animal_index(path=ANIMALS_DOCUMENT):
+    return data.load(path, _read_animal_index)
+
+
+def _read_alias_index(path):
+    return build_alias_index(load_document(path))
+
+
+# Alias index of the animal names, shared like the animal index
+def load_alias_index(path=ANIMALS_DOCUMENT):
+    return data.load(path, _read_alias_index)
+
+
+def _read_passage_index(path):
+    return build_passage_index(load_document(path))
+
+
+# Passage retrieval index of the document, shared like the animal index
+def load_passage_index(path=ANIMALS_DOCUMENT):
+    return data.load(path, _read_passage_index)
+
+
+# Questions that differ only in case, punctuation or spacing share a cache entry
+def normalize_question(question):
+    question = re.sub(r'[^\w\s]', ' ', question.lower())
+    return ' '.join(question.split())
+
+
+# Cache of model answers for this version of the document, keyed on
+# (normalized question, animal name). Editing the document loads a new
+# index, which starts with an empty cache.
+def answer_cache(animal_index):
+    return derived(animal_index, 'answer_cache', lambda index: AnswerCache())
@@ -0,0 +1,104 @@
+import math
+
+import folium
+import matplotlib
+import numpy as np
+
+from greencity.geometry_store import DETAIL_LEVELS, geometry_dicts
+
+# Single-layer choropleth for folium maps.
+#
+# All polygons go into one GeoJSON FeatureCollection. Colors and tooltips are
+# computed for all features at once and stored as feature properties, so the
+# map gets one layer instead of one layer per polygon.
+
+# Default AQI range for the color gradient
+AQI_MIN = 35
+AQI_MAX = 44
+
+_CMAP = matplotlib.colormaps['RdYlGn_r']
+
+
+# Zoom levels from which each simplified detail level of the geometry store is used,
+# keeping the simplification within a few pixels. Full detail (level 0) is only
+# used for the selected neighborhood, see geometry_store.map_geometries.
+_LEVEL_MIN_ZOOM = {1: 16, 2: 15, 3: 0}
+
+
+# Pick the coarsest simplified detail level that still looks sharp at this zoom
+def level_for_zoom(zoom):
+    for level, min_zoom in _LEVEL_MIN_ZOOM.items():
+        if level < len(DETAIL_LEVELS) and zoom >= min_zoom:
+            return level
+    return len(DETAIL_LEVELS) - 1
+
+
+# Web Mercator zoom at which `bounds` (minx, miny, maxx, maxy) fill a map of width x height pixels,
+# the same zoom Leaflet's fitBounds ends up with
+def zoom_for_bounds(bounds, width, height, max_zoom=18):
+    minx, miny, maxx, maxy = bounds
+
+    def mercator_y(lat):
+        return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+    x_fraction = max((maxx - minx) / 360, 1e-12)
+    y_fraction = max((mercator_y(maxy) - mercator_y(miny)) / (2 * math.pi), 1e-12)
+    zoom = min(math.log2(width / (256 * x_fraction)), math.log2(height / (256 * y_fraction)))
+    return max(0, min(max_zoom, math.floor(zoom)))
+
+
+# Map an array of values to hex colors in one vectorized pass
+def colors_for(values, vmin=AQI_MIN, vmax=AQI_MAX, cmap=_CMAP):
+    norm = matplotlib.colors.Normalize(vmin=vmin, vmax=vmax)
+    rgb = np.round(cmap(norm(np.asarray(values, dtype=float)))[:, :3] * 255).astype(int)
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb.tolist()]
+
+
+def _style(feature):
+    selected = feature['properties']['selected']
+    return {
+        'fillColor': feature['properties']['fill'],
+        'color': 'blue' if selected else 'black',
+        'weight': 5 if selected else 0.5,  # Thicker outline for the selected feature
+        'fillOpacity': 0.7,
+    }
+
+
+# Build the FeatureCollection with per-feature colors and tooltips.
+# `rows` limits the collection to these row positions; feature ids stay the row positions.
+def feature_collection(gdf, values, selected=None, name_column='Neighborhood', unit='AQI',
+                       vmin=AQI_MIN, vmax=AQI_MAX, geometries=None, rows=None):
+    if geometries is None:
+        geometries = geometry_dicts(gdf)
+    if rows is None:
+        rows = range(len(gdf))
+    rows = list(rows)
+    names = gdf[name_column].to_numpy()[rows].tolist()
+    values = np.asarray(values, dtype=float)[rows]
+    colors = colors_for(values, vmin, vmax)
+
+    features = [
+        {
+            'type': 'Feature',
+            'id': row,
+            'geometry': geometries[row],
+            'properties': {
+                'fill': color,
+                'selected': name == selected,
+                'tooltip': f"{name}: {value:.2f} {unit}",
+            },
+        }
+        for row, name, value, color in zip(rows, names, values.tolist(), colors)
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# Add the polygons of the GeoDataFrame to a map or feature group as one colored GeoJson layer
+def add_choropleth(parent, gdf, values, selected=None, **kwargs):
+    layer = folium.GeoJson(
+        feature_collection(gdf, values, selected, **kwargs),
+        style_function=_style,
+        tooltip=folium.GeoJsonTooltip(fields=['tooltip'], labels=False),
+    )
+    layer.add_to(parent)
+    return layer
@@ -0,0 +1,160 @@
+import collections
+import hashlib
+import os
+import shutil
+import sys
+import threading
+
+import numpy as np
+
+# Shared data access for all pages.
+#
+# Pages call load(path, loader) instead of reading files themselves. The
+# result of loader(path) is kept once per process and handed to every session
+# and page, so it must be treated as read-only.
+#
+# Every call checks the size and modification time of the file. When they
+# change, the content hash is compared as well, so a file that was only
+# touched is not loaded again. Datasets that were not used recently are
+# dropped when the total size of the loaded datasets exceeds the memory
+# budget.
+
+# Memory budget in MB for loaded datasets; override with GREENCITY_DATA_BUDGET_MB
+MEMORY_BUDGET = int(os.environ.get('GREENCITY_DATA_BUDGET_MB', '512')) * 1024 * 1024
+
+# Folder for files derived from the data, such as pre-parsed or converted copies
+CACHE_DIR = "data/.cache"
+
+_lock = threading.Lock()
+_datasets = collections.OrderedDict()  # (path, loader) -> _Dataset, least recently used first
+_loading_locks = collections.defaultdict(threading.Lock)
+
+
+class _Dataset:
+    def __init__(self, signature, content_hash, value, size):
+        self.signature = signature
+        self.content_hash = content_hash
+        self.value = value
+        self.size = size
+
+
+# Cheap check that runs on every call: size and modification time of the file
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+# Path in CACHE_DIR for a file derived from `path`, named after the content hash of `path`
+# so a changed source file never uses an outdated derived file
+def cache_path(path, suffix, content_hash=None):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    content_hash = content_hash or file_hash(path)
+    return os.path.join(CACHE_DIR, f"{stem}.{content_hash}{suffix}")
+
+
+# Remove derived files of older versions of the same source file
+def remove_other_versions(cached_path):
+    folder, name = os.path.split(cached_path)
+    stem, suffix = name.split('.')[0], '.'.join(name.split('.')[2:])
+    for other in os.listdir(folder):
+        other_path = os.path.join(folder, other)
+        if other.startswith(stem + '.') and other.endswith('.' + suffix) and other_path != cached_path:
+            try:
+                if os.path.isdir(other_path):
+                    shutil.rmtree(other_path)
+                else:
+                    os.remove(other_path)
+            except OSError:
+                pass
+
+
+# Write a derived file by calling write(tmp_path). The file is written to a temporary
+# path first and then moved into place, so other processes never read a half-written
+# file. Files of older versions of the same source are removed afterwards.
+def write_cache_file(cached_path, write, keep_other_versions=False):
+    os.makedirs(os.path.dirname(cached_path) or '.', exist_ok=True)
+    tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, cached_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if not keep_other_versions:
+        remove_other_versions(cached_path)
+
+
+# Estimated memory use of a loaded dataset in bytes
+def size_of(value):
+    if hasattr(value, 'memory_usage'):  # pandas and geopandas frames
+        size = int(value.memory_usage(deep=True).sum())
+        if hasattr(value, 'geometry'):
+            size += int(value.geometry.count_coordinates().sum()) * 16  # two float64 per coordinate
+        return size
+    if isinstance(value, np.memmap):  # lives in the page cache shared by all processes
+        return 0
+    if hasattr(value, 'nbytes'):  # NumPy arrays
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(k) + size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(size_of(v) for v in value)
+    if hasattr(value, '__dict__'):  # plain objects such as indexes: count their attributes
+        return sys.getsizeof(value) + size_of(vars(value))
+    return sys.getsizeof(value)
+
+
+def _enforce_budget(keep):
+    total = sum(dataset.size for dataset in _datasets.values())
+    for key in list(_datasets):
+        if total <= MEMORY_BUDGET:
+            break
+        if key != keep:
+            total -= _datasets.pop(key).size
+
+
+# Return loader(path), loaded once per process and reloaded when the file changes
+def load(path, loader):
+    key = (os.path.abspath(path), loader)
+    signature = file_signature(path)
+    with _lock:
+        dataset = _datasets.get(key)
+        if dataset is not None and dataset.signature == signature:
+            _datasets.move_to_end(key)
+            return dataset.value
+        loading_lock = _loading_locks[key]
+
+    # Only one thread loads a file; other sessions asking for it wait for the result
+    with loading_lock:
+        signature = file_signature(path)
+        with _lock:
+            dataset = _datasets.get(key)
+        if dataset is not None and dataset.signature == signature:
+            return dataset.value
+
+        content_hash = file_hash(path)
+        if dataset is not None and dataset.content_hash == content_hash:
+            value = dataset.value  # file was touched but not changed
+        else:
+            value = loader(path)
+
+        with _lock:
+            _datasets[key] = _Dataset(signature, content_hash, value, size_of(value))
+            _datasets.move_to_end(key)
+            _enforce_budget(keep=key)
+        return value
+
+
+# Forget all loaded datasets
+def clear():
+    with _lock:
+        _datasets.clear()
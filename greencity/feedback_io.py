@@ -0,0 +1,160 @@
+import argparse
+import csv
+import io
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from greencity.feedback_store import FEEDBACK_DB, open_store
+
+# Bulk import and export for the Community Feedback Loop.
+#
+# Files are read and written in batches of BATCH_SIZE rows, and every batch
+# is inserted in one transaction, so memory use stays the same whatever the
+# size of the file. Files can be CSV or Parquet; the format follows from the
+# file name.
+#
+# Usage:
+#   python -m greencity.feedback_io import-projects projects.csv
+#   python -m greencity.feedback_io import-feedback surveys.parquet
+#   python -m greencity.feedback_io export-feedback feedback.csv --project 3
+
+BATCH_SIZE = 5000
+
+PROJECT_COLUMNS = ['title', 'description', 'timeline', 'expected_impact']
+FEEDBACK_COLUMNS = ['project_id', 'username', 'rating', 'comment']
+EXPORT_COLUMNS = ['id', 'project_id', 'username', 'rating', 'comment', 'created_at']
+
+
+# 'csv' or 'parquet' from a file name
+def file_format(name):
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"{name}: unsupported file type, use .csv or .parquet")
+
+
+# DataFrames of at most batch_size rows from a CSV or Parquet path or file object
+def read_batches(source, fmt, columns, batch_size=BATCH_SIZE):
+    if fmt == 'csv':
+        batches = pd.read_csv(source, chunksize=batch_size, dtype={'comment': str, 'description': str})
+    else:
+        batches = (batch.to_pandas() for batch in pq.ParquetFile(source).iter_batches(batch_size=batch_size))
+
+    for batch in batches:
+        missing = [column for column in columns if column not in batch.columns]
+        if missing:
+            raise ValueError(f"missing columns: {', '.join(missing)}")
+        yield batch[columns].copy()
+
+
+# Raise a ValueError naming the first row where `invalid` (a boolean Series) is set
+def _check(invalid, count, message):
+    invalid = invalid.to_numpy()
+    if invalid.any():
+        raise ValueError(f"row {count + int(invalid.argmax()) + 1}: {message}")
+
+
+# The column as whole numbers, checking that every value is one between low and high
+def _whole_numbers(batch, column, count, low=None, high=None):
+    values = pd.to_numeric(batch[column], errors='coerce')
+    invalid = values.isna() | (values % 1 != 0)
+    if low is not None:
+        invalid |= ~values.between(low, high)
+    _check(invalid, count, f"{column} must be a whole number" + (f" between {low} and {high}" if low is not None else ""))
+    return values.astype('int64')
+
+
+# Import project rows; returns the number of rows imported. A batch with an
+# invalid row is not imported, batches before it stay imported.
+def import_projects(store, source, fmt, batch_size=BATCH_SIZE):
+    count = 0
+    for batch in read_batches(source, fmt, PROJECT_COLUMNS, batch_size):
+        batch = batch.fillna({'description': '', 'expected_impact': 0})
+        for column in ('title', 'timeline'):
+            _check(batch[column].isna(), count, f"{column} is empty")
+        batch['expected_impact'] = _whole_numbers(batch, 'expected_impact', count)
+        try:
+            store.add_projects_many(batch.itertuples(index=False, name=None))
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"rows {count + 1}-{count + len(batch)}: {e}") from e
+        count += len(batch)
+    return count
+
+
+# Import feedback rows; returns the number of rows imported. A batch with an
+# invalid row is not imported, batches before it stay imported.
+def import_feedback(store, source, fmt, batch_size=BATCH_SIZE):
+    count = 0
+    for batch in read_batches(source, fmt, FEEDBACK_COLUMNS, batch_size):
+        batch = batch.fillna({'comment': ''})
+        batch['project_id'] = _whole_numbers(batch, 'project_id', count)
+        batch['rating'] = _whole_numbers(batch, 'rating', count, 1, 5)
+        try:
+            store.add_feedback_many(batch.itertuples(index=False, name=None))
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"rows {count + 1}-{count + len(batch)}: {e}") from e
+        count += len(batch)
+    return count
+
+
+# Write the feedback of a project (or all feedback) to a CSV or Parquet path or
+# binary file object, one batch at a time; returns the number of rows written
+def export_feedback(store, target, fmt, project_id=None, batch_size=BATCH_SIZE):
+    count = 0
+    if fmt == 'csv':
+        file = open(target, 'wb') if isinstance(target, str) else target
+        text = io.TextIOWrapper(file, encoding='utf-8', newline='')
+        writer = csv.DictWriter(text, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for rows in store.iter_feedback(project_id, batch_size):
+            writer.writerows(rows)
+            count += len(rows)
+        text.flush()
+        text.detach()  # leave the file itself open for the caller
+        if isinstance(target, str):
+            file.close()
+        return count
+
+    schema = pa.schema([('id', pa.int64()), ('project_id', pa.int64()), ('username', pa.string()),
+                        ('rating', pa.int64()), ('comment', pa.string()), ('created_at', pa.float64())])
+    with pq.ParquetWriter(target, schema) as writer:
+        for rows in store.iter_feedback(project_id, batch_size):
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            count += len(rows)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and export Community Feedback Loop projects and feedback.")
+    parser.add_argument('--db', default=FEEDBACK_DB, help="feedback database file")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="rows per batch")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('import-projects', help="add projects from a CSV or Parquet file").add_argument('file')
+    commands.add_parser('import-feedback', help="add feedback from a CSV or Parquet file").add_argument('file')
+    export = commands.add_parser('export-feedback', help="write feedback to a CSV or Parquet file")
+    export.add_argument('file')
+    export.add_argument('--project', type=int, default=None, help="only the feedback of this project id")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.db)
+    try:
+        fmt = file_format(args.file)
+        if args.command == 'import-projects':
+            print(f"Imported {import_projects(store, args.file, fmt, args.batch_size)} projects")
+        elif args.command == 'import-feedback':
+            print(f"Imported {import_feedback(store, args.file, fmt, args.batch_size)} feedback entries")
+        else:
+            print(f"Exported {export_feedback(store, args.file, fmt, args.project, args.batch_size)} feedback entries to {args.file}")
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+
+
+if __name__ == '__main__':
+    main()
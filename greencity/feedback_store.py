@@ -0,0 +1,298 @@
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Storage for the Community Feedback Loop: users, projects and feedback.
+#
+# The data lives in an SQLite database, so it is shared by all sessions and
+# kept across restarts. The database runs in WAL mode, so sessions reading
+# projects and feedback are not blocked by a session writing feedback.
+# Streamlit runs every rerun in a new thread, so connections are kept in a
+# small pool shared by all threads instead of being opened per thread; a
+# query borrows one and puts it back. Many rows are written in one
+# transaction with add_feedback_many().
+#
+# Per-project aggregates (count, rating sum, rating histogram, last update)
+# are kept in project_stats and updated in the same transaction as every
+# feedback insert, so reading them never scans the feedback. rebuild_stats()
+# recomputes them from the feedback in one grouped query.
+
+# Database file; override with GREENCITY_FEEDBACK_DB
+FEEDBACK_DB = os.environ.get('GREENCITY_FEEDBACK_DB', "data/feedback.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    is_admin INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    timeline TEXT NOT NULL,
+    expected_impact INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id INTEGER NOT NULL REFERENCES projects(id),
+    username TEXT NOT NULL,
+    rating INTEGER NOT NULL CHECK (rating BETWEEN 1 AND 5),
+    comment TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feedback_project_id ON feedback (project_id, id);
+CREATE TABLE IF NOT EXISTS project_stats (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id),
+    feedback_count INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    rating_1 INTEGER NOT NULL,
+    rating_2 INTEGER NOT NULL,
+    rating_3 INTEGER NOT NULL,
+    rating_4 INTEGER NOT NULL,
+    rating_5 INTEGER NOT NULL,
+    last_updated REAL NOT NULL
+);
+"""
+
+RATINGS = range(1, 6)
+_HISTOGRAM_COLUMNS = ', '.join(f"rating_{rating}" for rating in RATINGS)
+
+# Rows per page of the project and feedback lists
+PAGE_SIZE = 10
+
+# Connections kept open for reuse; more are opened when all are in use
+POOL_SIZE = 4
+
+# Demo accounts, created when the database is new
+DEMO_USERS = [
+    ('admin', 'admin@example.com', 'admin', 1),
+    ('user', 'user@example.com', 'user', 0),
+]
+
+
+class FeedbackStore:
+    def __init__(self, path=FEEDBACK_DB):
+        self.path = path
+        self._pool = queue.LifoQueue(POOL_SIZE)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO users (username, email, password, is_admin) VALUES (?, ?, ?, ?)", DEMO_USERS)
+            # Databases created before project_stats existed get their aggregates computed once
+            if connection.execute("SELECT NOT EXISTS (SELECT 1 FROM project_stats) AND EXISTS (SELECT 1 FROM feedback)").fetchone()[0]:
+                self._rebuild_stats(connection)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, fewer fsyncs per commit
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    # Context manager lending a connection from the pool to the calling thread
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            yield connection
+        finally:
+            try:
+                self._pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    # Context manager for one write transaction: committed at the end, rolled back on errors
+    @contextlib.contextmanager
+    def transaction(self):
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")  # take the write lock now instead of failing halfway
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def _rows(self, query, parameters=()):
+        with self.connection() as connection:
+            return [dict(row) for row in connection.execute(query, parameters)]
+
+    def _row(self, query, parameters=()):
+        with self.connection() as connection:
+            row = connection.execute(query, parameters).fetchone()
+        return dict(row) if row is not None else None
+
+    # Users
+
+    # The user as a dict, or None when the username or password is wrong
+    def login(self, username, password):
+        user = self._row("SELECT username, email, is_admin FROM users WHERE username = ? AND password = ?",
+                         (username, password))
+        if user is not None:
+            user['is_admin'] = bool(user['is_admin'])
+        return user
+
+    # Projects
+
+    def add_project(self, title, description, timeline, expected_impact):
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO projects (title, description, timeline, expected_impact) VALUES (?, ?, ?, ?)",
+                (title, description, timeline, int(expected_impact)))
+            return cursor.lastrowid
+
+    # Insert many (title, description, timeline, expected_impact) rows in one transaction
+    def add_projects_many(self, rows):
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT INTO projects (title, description, timeline, expected_impact) VALUES (?, ?, ?, ?)",
+                [(title, description, timeline, int(expected_impact)) for title, description, timeline, expected_impact in rows])
+
+    def get_project(self, project_id):
+        return self._row("SELECT * FROM projects WHERE id = ?", (project_id,))
+
+    def list_projects(self):
+        return self._rows("SELECT * FROM projects ORDER BY id")
+
+    def count_projects(self):
+        return self._row("SELECT COUNT(*) AS count FROM projects")['count']
+
+    # Pages are found by key (the id of the last row of the previous page) instead of an
+    # offset, so the database never reads the rows of earlier pages. Each returns
+    # (rows newest first, cursor of the next page or None on the last page).
+
+    def projects_page(self, before_id=None, limit=PAGE_SIZE):
+        if before_id is None:
+            rows = self._rows("SELECT * FROM projects ORDER BY id DESC LIMIT ?", (limit + 1,))
+        else:
+            rows = self._rows("SELECT * FROM projects WHERE id < ? ORDER BY id DESC LIMIT ?", (before_id, limit + 1))
+        return _page(rows, limit)
+
+    # Feedback
+
+    def add_feedback(self, project_id, username, rating, comment):
+        self.add_feedback_many([(project_id, username, rating, comment)])
+
+    # Insert many (project_id, username, rating, comment) rows in one transaction
+    # and add them to the aggregates of their projects
+    def add_feedback_many(self, rows):
+        now = time.time()
+        rows = [(int(project_id), username, int(rating), comment, now) for project_id, username, rating, comment in rows]
+        deltas = {}  # project_id -> [count, rating sum, histogram...]
+        for project_id, username, rating, comment, created_at in rows:
+            delta = deltas.setdefault(project_id, [0, 0] + [0] * len(RATINGS))
+            delta[0] += 1
+            delta[1] += rating
+            if rating in RATINGS:
+                delta[1 + rating] += 1
+
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT INTO feedback (project_id, username, rating, comment, created_at) VALUES (?, ?, ?, ?, ?)", rows)
+            connection.executemany(
+                f"INSERT INTO project_stats (project_id, feedback_count, rating_sum, {_HISTOGRAM_COLUMNS}, last_updated) "
+                f"VALUES (?, ?, ?, {', '.join('?' for _ in RATINGS)}, ?) "
+                "ON CONFLICT (project_id) DO UPDATE SET "
+                "feedback_count = feedback_count + excluded.feedback_count, "
+                "rating_sum = rating_sum + excluded.rating_sum, "
+                + ''.join(f"rating_{rating} = rating_{rating} + excluded.rating_{rating}, " for rating in RATINGS)
+                + "last_updated = excluded.last_updated",
+                [(project_id, *delta, now) for project_id, delta in deltas.items()])
+
+    # A page of the feedback of a project, newest first, read from the (project_id, id) index
+    def feedback_page(self, project_id, before_id=None, limit=PAGE_SIZE):
+        if before_id is None:
+            rows = self._rows("SELECT * FROM feedback WHERE project_id = ? ORDER BY id DESC LIMIT ?",
+                              (project_id, limit + 1))
+        else:
+            rows = self._rows("SELECT * FROM feedback WHERE project_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                              (project_id, before_id, limit + 1))
+        return _page(rows, limit)
+
+    # All feedback, or that of one project, oldest first in lists of at most batch_size rows.
+    # Each batch is read by key after the previous one, so memory use does not grow with the table.
+    def iter_feedback(self, project_id=None, batch_size=PAGE_SIZE):
+        last_id = 0
+        while True:
+            if project_id is None:
+                rows = self._rows("SELECT * FROM feedback WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))
+            else:
+                rows = self._rows("SELECT * FROM feedback WHERE project_id = ? AND id > ? ORDER BY id LIMIT ?",
+                                  (project_id, last_id, batch_size))
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]['id']
+
+    # Aggregates
+
+    # Count, rating sum, average (0 without feedback), histogram and last update of a project
+    def project_stats(self, project_id):
+        row = self._row("SELECT * FROM project_stats WHERE project_id = ?", (project_id,))
+        return _stats(row) if row is not None else empty_stats()
+
+    # Statistics of all projects that have feedback, by project id, in one query
+    def all_project_stats(self):
+        return {row['project_id']: _stats(row) for row in self._rows("SELECT * FROM project_stats")}
+
+    def _rebuild_stats(self, connection):
+        connection.execute("DELETE FROM project_stats")
+        connection.execute(
+            f"INSERT INTO project_stats (project_id, feedback_count, rating_sum, {_HISTOGRAM_COLUMNS}, last_updated) "
+            "SELECT project_id, COUNT(*), SUM(rating), "
+            + ', '.join(f"SUM(rating = {rating})" for rating in RATINGS)
+            + ", MAX(created_at) FROM feedback GROUP BY project_id")
+
+    # Recompute all aggregates from the feedback, e.g. after editing the feedback table directly
+    def rebuild_stats(self):
+        with self.transaction() as connection:
+            self._rebuild_stats(connection)
+
+
+# One row more than a page is read to know whether there is a next page
+def _page(rows, limit):
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1]['id']
+    return rows, None
+
+
+def _stats(row):
+    count = row['feedback_count']
+    return {
+        'count': count,
+        'rating_sum': row['rating_sum'],
+        'average': row['rating_sum'] / count if count else 0,
+        'histogram': {rating: row[f"rating_{rating}"] for rating in RATINGS},
+        'last_updated': row['last_updated'],
+    }
+
+
+# Statistics of a project without feedback
+def empty_stats():
+    return {'count': 0, 'rating_sum': 0, 'average': 0, 'histogram': {rating: 0 for rating in RATINGS}, 'last_updated': None}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# The store for a database file, shared by all sessions of the process
+def open_store(path=FEEDBACK_DB):
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = FeedbackStore(path)
+        return _stores[key]
+
@@ -0,0 +1,101 @@
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from greencity import data
+from greencity.cache import derived
+
+# Process-wide store for the Eindhoven neighborhood polygons.
+#
+# The CSV keeps every polygon as a GeoJSON string, which is slow to parse.
+# The first time a CSV version is seen, it is parsed once and written to a
+# GeoParquet sidecar (geometries stored as WKB) next to the data, so other
+# worker processes only read the sidecar. The parsed GeoDataFrame is kept in
+# memory by the shared data layer (greencity.data) and shared by every session
+# of this process. Editing the CSV changes its content hash and triggers a
+# new parse.
+
+NEIGHBORHOODS_CSV = "data/Neighborhoods_Eindhoven.csv"
+
+# Detail levels for map payloads, from full detail (0) to coarse (3).
+# Each level is (simplification tolerance in degrees, decimals kept per coordinate).
+# At Eindhoven's latitude 0.0001 degrees is roughly 10 meters.
+DETAIL_LEVELS = [
+    (0.0, 6),
+    (0.00002, 6),
+    (0.0001, 5),
+    (0.0003, 5),
+]
+
+
+# Parse the CSV, converting all GeoJSON strings to shapely geometries in one vectorized call
+def _parse_csv(csv_path):
+    df = pd.read_csv(csv_path)
+    geometry = shapely.from_geojson(df.pop('geometry').to_numpy())
+    return gpd.GeoDataFrame(df, geometry=geometry, crs='EPSG:4326')
+
+
+def _load(csv_path):
+    sidecar_path = data.cache_path(csv_path, '.parquet')
+    if os.path.exists(sidecar_path):
+        try:
+            return gpd.read_parquet(sidecar_path)
+        except Exception:
+            pass  # unreadable sidecar, parse the CSV again below
+
+    gdf = _parse_csv(csv_path)
+    try:
+        data.write_cache_file(sidecar_path, lambda tmp_path: gdf.to_parquet(tmp_path, index=False))
+    except OSError:
+        pass  # read-only checkout: keep working from memory
+    return gdf
+
+
+# Return the neighborhoods as a GeoDataFrame shared by all sessions.
+# The returned frame must be treated as read-only; copy it before modifying.
+def load_neighborhoods(csv_path=NEIGHBORHOODS_CSV):
+    return data.load(csv_path, _load)
+
+
+# Simplify all polygons at once. Coverage simplification keeps the borders shared
+# by neighboring polygons identical (needs shapely 2.1 / GEOS 3.12); older
+# versions fall back to per-polygon simplification that keeps every polygon valid.
+def _simplify(geometries, tolerance):
+    if tolerance <= 0:
+        return geometries
+    if hasattr(shapely, 'coverage_simplify'):
+        try:
+            return shapely.coverage_simplify(geometries, tolerance)
+        except shapely.errors.GEOSException:
+            pass  # not a clean coverage
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def _level_geometry_dicts(gdf, level):
+    tolerance, decimals = DETAIL_LEVELS[level]
+    geometries = _simplify(gdf.geometry.values, tolerance)
+    geometries = shapely.transform(geometries, lambda coords: np.round(coords, decimals))
+    return [json.loads(geojson) for geojson in shapely.to_geojson(geometries)]
+
+
+# GeoJSON geometry dicts of all neighborhoods at the given detail level,
+# computed once per level for the shared GeoDataFrame
+def geometry_dicts(gdf, level=0):
+    return derived(gdf, f'geometry_dicts_{level}', lambda gdf: _level_geometry_dicts(gdf, level))
+
+
+# Geometries for a map at the given level, with full detail only for the rows in `detailed_rows`.
+# The other rows are always simplified (at least level 1).
+def map_geometries(gdf, level, detailed_rows=()):
+    geometries = geometry_dicts(gdf, max(level, 1))
+    if len(detailed_rows) == 0:
+        return geometries
+    geometries = list(geometries)
+    full_detail = geometry_dicts(gdf, 0)
+    for row in detailed_rows:
+        geometries[row] = full_detail[row]
+    return geometries
@@ -0,0 +1,48 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from greencity import data
+from greencity.pc4_store import open_records
+from greencity.postcode_index import PostcodeIndex
+
+# Helpers for the Green Space Analysis page.
+#
+# The PC4 file covers all ~4,000 Dutch postal codes. Drawing every postal code
+# as an SVG marker makes the browser slow, so the nationwide view uses WebGL
+# traces and can bin or sample the points before they are sent.
+
+PC4_CSV = 'data/PC4_TreesBushesGrass.csv'
+
+# Postal code range of Rotterdam, the default region of the page
+ROTTERDAM_POSTCODES = (3000, 3099)
+
+
+# Index over the memory-mapped binary copy of the CSV, so workers share the data pages
+def _read_postcode_index(path):
+    return PostcodeIndex(open_records(path))
+
+
+# Index over the PC4 greenery data, shared by all sessions and rebuilt when the file changes
+def load_postcode_index(path=PC4_CSV):
+    return data.load(path, _read_postcode_index)
+
+
+# Keep at most `max_points` rows, chosen at random but the same on every rerun
+def downsample(df, max_points, seed=0):
+    if len(df) <= max_points:
+        return df
+    return df.sample(n=max_points, random_state=seed).sort_index()
+
+
+# Count the postal codes per cell of a bins x bins grid and return it as a heatmap trace.
+# Only the grid is sent to the browser, so its size does not depend on the number of rows.
+def density_heatmap(df, x, y, bins=50, value_range=(0, 100), name='Postal codes'):
+    counts, x_edges, y_edges = np.histogram2d(
+        df[x].to_numpy(), df[y].to_numpy(), bins=bins, range=[value_range, value_range])
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return go.Heatmap(
+        x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan).T,
+        colorscale='Greens', name=name, colorbar=dict(title='Postal codes'),
+        hovertemplate='Trees: %{x:.0f}%<br>Grass: %{y:.0f}%<br>Postal codes: %{z}<extra></extra>',
+    )
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+
+from greencity import data
+from greencity.passage_index import tokenize
+
+# Catalogue of nature-inclusive measures shown on the Nature Inclusive Measures page
+
+MEASURES_JSON = "data/youssef/json.json"
+
+
+def _read_measures(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)["items"]
+
+
+# All measures, shared by all sessions and reloaded when the file changes
+def load_measures(path=MEASURES_JSON):
+    return data.load(path, _read_measures)
+
+
+# Words of everything a visitor can read about a measure: name, descriptions and guidelines
+def _measure_text(item):
+    parts = [item["name"]]
+    for section in item.get("sections", []):
+        parts += [section.get("header", ""), section.get("text", "")]
+    for guideline in item.get("guidelines", {}).get("options", []):
+        parts += [guideline.get("title", ""), guideline.get("text", "")]
+    return ' '.join(parts)
+
+
+def _postings(positions_per_value):
+    return {value: np.asarray(positions, dtype=np.int32) for value, positions in sorted(positions_per_value.items())}
+
+
+# Faceted search over the measures.
+#
+# Posting lists (sorted arrays of item positions) per category, per target
+# group and per word of the text. Filters intersect the posting lists of the
+# chosen values, so they only touch the matching items instead of testing
+# every measure.
+class MeasureIndex:
+    def __init__(self, items):
+        self.items = items
+        self.by_name = {item["name"]: item for item in items}
+        categories, target_groups, words = {}, {}, {}
+        for position, item in enumerate(items):
+            categories.setdefault(item["categories"], []).append(position)
+            for group in item.get("Target group", []):
+                target_groups.setdefault(group, []).append(position)
+            for word in set(tokenize(_measure_text(item))):
+                words.setdefault(word, []).append(position)
+        self.categories = _postings(categories)
+        self.target_groups = _postings(target_groups)
+        self._words = _postings(words)
+        self._all = np.arange(len(items), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.items)
+
+    # Positions of the measures containing every word of the query
+    def search(self, query):
+        positions = self._all
+        for word in set(tokenize(query)):
+            positions = np.intersect1d(positions, self._words.get(word, self._all[:0]), assume_unique=True)
+        return positions
+
+    # Positions of the measures matching all given filters; None means no filter
+    def filter(self, category=None, target_group=None, query=None):
+        positions = self._all if not query else self.search(query)
+        if category is not None:
+            positions = np.intersect1d(positions, self.categories.get(category, self._all[:0]), assume_unique=True)
+        if target_group is not None:
+            positions = np.intersect1d(positions, self.target_groups.get(target_group, self._all[:0]), assume_unique=True)
+        return positions
+
+    # Number of the given measures per value of a facet, e.g. per category
+    def facet_counts(self, postings, positions):
+        return {value: len(np.intersect1d(positions, value_positions, assume_unique=True))
+                for value, value_positions in postings.items()}
+
+    def select(self, positions):
+        return [self.items[position] for position in positions]
+
+
+def _read_measure_index(path):
+    return MeasureIndex(_read_measures(path))
+
+
+# Search index over the measures, shared by all sessions and rebuilt when the file changes
+def load_measure_index(path=MEASURES_JSON):
+    return data.load(path, _read_measure_index)
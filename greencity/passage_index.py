@@ -0,0 +1,103 @@
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+# Passage retrieval for the Animal Chatbot.
+#
+# Every section of the document is cut into short overlapping passages of a
+# few sentences, and an inverted index maps every word to the passages that
+# contain it. A question is scored with BM25 by walking only the posting
+# lists of its own words, so the cost of a search depends on how often those
+# words occur, not on reading every passage. The chatbot then gives only the
+# best few passages to the QA model instead of whole sections.
+
+SENTENCES_PER_PASSAGE = 3
+PASSAGE_STRIDE = 2
+
+# BM25 parameters: term frequency saturation and document length normalization
+K1 = 1.2
+B = 0.75
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'how', 'i',
+    'in', 'is', 'it', 'me', 'of', 'on', 'or', 'should', 'so', 'that', 'the', 'their', 'them', 'they',
+    'this', 'to', 'what', 'when', 'where', 'which', 'who', 'why', 'with', 'you',
+}
+
+
+# Lowercase words without stop words; a plural 's' is dropped so "birds" matches "bird"
+def tokenize(text):
+    words = re.findall(r'\w+', text.lower())
+    return [word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+            for word in words if word not in STOP_WORDS]
+
+
+# Cut a section into passages of SENTENCES_PER_PASSAGE sentences, overlapping by one sentence
+def split_passages(section):
+    lines = section.strip().split('\n', 1)
+    body = lines[1] if len(lines) > 1 else lines[0]
+    sentences = re.split(r'(?<=[.!?])\s+', body.strip())
+    passages = []
+    for start in range(0, max(len(sentences) - SENTENCES_PER_PASSAGE + PASSAGE_STRIDE, 1), PASSAGE_STRIDE):
+        passages.append(' '.join(sentences[start:start + SENTENCES_PER_PASSAGE]))
+    return passages
+
+
+class Passage(NamedTuple):
+    section: str  # key of the section in the animal index, or its title
+    text: str
+
+
+class PassageIndex:
+    # sections: (key, text) pairs, one per section of the document
+    def __init__(self, sections):
+        self.passages = []
+        self.section_ranges = {}  # section key -> positions [start, end) of its passages
+        postings = {}  # word -> {passage number: count}
+        lengths = []
+        for key, section in sections:
+            title = section.strip().split('\n', 1)[0]
+            start = len(self.passages)
+            for text in split_passages(section):
+                words = tokenize(title + ' ' + text)  # the title makes a passage findable by animal name
+                for word in words:
+                    counts = postings.setdefault(word, {})
+                    counts[len(self.passages)] = counts.get(len(self.passages), 0) + 1
+                self.passages.append(Passage(key, text))
+                lengths.append(len(words))
+            self.section_ranges[key] = (start, len(self.passages))
+
+        # Posting lists in compressed sparse rows: the passages containing word w are
+        # passage_ids[offsets[i]:offsets[i + 1]] with i = self.vocabulary[w]
+        self.vocabulary = {word: i for i, word in enumerate(postings)}
+        self.offsets = np.concatenate([[0], np.cumsum([len(counts) for counts in postings.values()])]).astype(np.int64)
+        self.passage_ids = np.fromiter((p for counts in postings.values() for p in counts), dtype=np.int32, count=self.offsets[-1])
+        self.term_counts = np.fromiter((c for counts in postings.values() for c in counts.values()), dtype=np.float32, count=self.offsets[-1])
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        self.average_length = float(self.lengths.mean()) if len(lengths) else 0.0
+        document_frequency = np.diff(self.offsets)
+        self.idf = np.log(1 + (len(self.passages) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def __len__(self):
+        return len(self.passages)
+
+    # The k best passages for the question as (score, Passage), best first.
+    # With `section` only passages of that section are considered.
+    def search(self, question, k=3, section=None):
+        start, end = self.section_ranges.get(section, (0, 0)) if section is not None else (0, len(self.passages))
+        scores = np.zeros(len(self.passages))
+        for word in set(tokenize(question)):
+            i = self.vocabulary.get(word)
+            if i is None:
+                continue
+            ids = self.passage_ids[self.offsets[i]:self.offsets[i + 1]]
+            tf = self.term_counts[self.offsets[i]:self.offsets[i + 1]]
+            norm = K1 * (1 - B + B * self.lengths[ids] / self.average_length)
+            scores[ids] += self.idf[i] * tf * (K1 + 1) / (tf + norm)
+
+        candidates = start + np.flatnonzero(scores[start:end] > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(float(scores[i]), self.passages[i]) for i in candidates]
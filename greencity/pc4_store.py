@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from greencity import data
+
+# Compact binary copy of the PC4 greenery dataset.
+#
+# The CSV is converted once to a NumPy file with one typed record per postal
+# code (uint16 postcode, float32 percentages), sorted by postal code. The file
+# is opened memory-mapped, so no text is parsed on start-up and every worker
+# process reads the same physical pages from the operating system's page
+# cache instead of holding its own copy. Like the neighborhood sidecar, the
+# file is named after the content hash of the CSV, so editing the CSV triggers
+# a new conversion.
+#
+# Usage (optional, the first load converts the file as well):
+#   python -m greencity.pc4_store data/PC4_TreesBushesGrass.csv
+
+KEY = 'Postcode'
+KEY_DTYPE = np.uint16
+VALUE_DTYPE = np.float32
+
+
+# Read the CSV into a record array with compact column types, sorted by postal code
+def _to_records(csv_path):
+    df = pd.read_csv(csv_path, delimiter=';')
+    postcodes = df[KEY].to_numpy()
+    if not np.issubdtype(postcodes.dtype, np.integer):
+        raise ValueError(f"{csv_path}: column {KEY} must contain numeric postal codes")
+    limits = np.iinfo(KEY_DTYPE)
+    if len(postcodes) and (postcodes.min() < limits.min or postcodes.max() > limits.max):
+        raise ValueError(f"{csv_path}: postal codes do not fit in {np.dtype(KEY_DTYPE).name}")
+
+    value_columns = [name for name in df.columns if name != KEY]
+    records = np.empty(len(df), dtype=[(KEY, KEY_DTYPE)] + [(name, VALUE_DTYPE) for name in value_columns])
+    order = np.argsort(postcodes, kind='stable')
+    records[KEY] = postcodes[order]
+    for name in value_columns:
+        records[name] = df[name].to_numpy()[order]
+    return records
+
+
+# Convert the CSV to the binary format and return the path of the written file
+def convert(csv_path, out_path=None):
+    in_cache = out_path is None
+    out_path = out_path or data.cache_path(csv_path, '.npy')
+    records = _to_records(csv_path)
+
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as file:
+            np.save(file, records)
+
+    data.write_cache_file(out_path, write, keep_other_versions=not in_cache)
+    return out_path
+
+
+# The PC4 records, memory-mapped read-only; converts the CSV first if needed.
+# Falls back to an in-memory copy when the converted file cannot be written.
+def open_records(csv_path):
+    out_path = data.cache_path(csv_path, '.npy')
+    if not os.path.exists(out_path):
+        try:
+            convert(csv_path)
+        except OSError:
+            return _to_records(csv_path)  # read-only checkout: keep working from memory
+    return np.load(out_path, mmap_mode='r')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the PC4 greenery CSV to a memory-mappable binary file.")
+    parser.add_argument('input', help="semicolon-delimited PC4 CSV file")
+    parser.add_argument('output', nargs='?', default=None, help="output .npy file (default: next to the data in data/.cache)")
+    args = parser.parse_args(argv)
+
+    try:
+        out_path = convert(args.input, args.output)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+    print(f"Wrote {out_path}")
+
+
+if __name__ == '__main__':
+    main()
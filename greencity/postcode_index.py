@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Postal code keyed index over a table with one row per postal code.
+#
+# The rows are kept sorted by postal code as NumPy arrays. Postal codes and
+# ranges of postal codes are found with a binary search, and the prefix sums of
+# every numeric column give the mean over any range of rows in O(1). The cost
+# of a page interaction therefore hardly grows with the size of the dataset.
+#
+# The table can be a DataFrame or a NumPy record array. Columns that are
+# already sorted are used as they are, so a memory-mapped record array
+# (see greencity.pc4_store) is not copied into the process.
+
+
+def _column_names(table):
+    return table.dtype.names if hasattr(table, 'dtype') else list(table.columns)
+
+
+class PostcodeIndex:
+    def __init__(self, table, key='Postcode'):
+        self.key = key
+        postcodes = np.asanyarray(table[key])
+        columns = {name: np.asanyarray(table[name]) for name in _column_names(table) if name != key}
+        if np.any(postcodes[1:] < postcodes[:-1]):
+            order = np.argsort(postcodes, kind='stable')
+            postcodes = postcodes[order]
+            columns = {name: values[order] for name, values in columns.items()}
+        self.postcodes = postcodes
+        self.columns = columns
+        self._prefix_sums = {
+            name: np.concatenate([[0.0], np.cumsum(values, dtype=float)])
+            for name, values in self.columns.items()
+            if np.issubdtype(values.dtype, np.number)
+        }
+
+    def __len__(self):
+        return len(self.postcodes)
+
+    def __contains__(self, postcode):
+        return self._find(postcode) is not None
+
+    def _find(self, postcode):
+        position = int(np.searchsorted(self.postcodes, postcode))
+        if position < len(self.postcodes) and self.postcodes[position] == postcode:
+            return position
+        return None
+
+    # Position of a postal code in sorted order; raises KeyError for unknown postal codes
+    def position(self, postcode):
+        position = self._find(postcode)
+        if position is None:
+            raise KeyError(postcode)
+        return position
+
+    def value(self, postcode, column):
+        return self.columns[column][self.position(postcode)]
+
+    # Positions [start, end) of the postal codes between low and high, both included
+    def range(self, low, high):
+        start = int(np.searchsorted(self.postcodes, low, side='left'))
+        end = int(np.searchsorted(self.postcodes, high, side='right'))
+        return start, end
+
+    # Positions [start, end) of the postal code with `count` neighbors on each side,
+    # limited to the positions [lower, upper)
+    def window(self, postcode, count, lower=0, upper=None):
+        upper = len(self) if upper is None else upper
+        position = self.position(postcode)
+        return max(position - count, lower), min(position + count + 1, upper)
+
+    # Mean of a column over the positions [start, end)
+    def mean(self, column, start=0, end=None):
+        end = len(self) if end is None else end
+        if end <= start:
+            return np.nan
+        prefix_sums = self._prefix_sums[column]
+        return (prefix_sums[end] - prefix_sums[start]) / (end - start)
+
+    # The rows at positions [start, end) as a DataFrame, e.g. for plotting
+    def frame(self, start=0, end=None):
+        end = len(self) if end is None else end
+        data = {self.key: self.postcodes[start:end]}
+        data.update((name, values[start:end]) for name, values in self.columns.items())
+        return pd.DataFrame(data)
@@ -0,0 +1,83 @@
+import argparse
+import io
+import statistics
+import time
+
+from greencity.chatbot import ANIMALS_DOCUMENT, load_animal_index
+from greencity.qa_model import build_pipeline
+
+# Compare the full-precision and the int8 quantized chatbot model.
+#
+# Asks a fixed set of questions about AnimalsTest.txt in both modes and
+# prints, per mode, the loading time, the size of the model weights, the
+# latency per question and how many answers contain the expected text.
+#
+# Usage:
+#   python -m greencity.qa_benchmark --repeat 5
+
+# (animal section, question, text the answer should contain)
+QUESTIONS = [
+    ('huismus', "At what height should nest boxes for house sparrows be installed?", "3 to 10 meters"),
+    ('huismus', "How far apart should the nest boxes be?", "50 centimetres"),
+    ('gierzwaluw', "How many nesting places per building do swifts need?", "5 to 20"),
+    ('gierzwaluw', "Up to what height do swifts nest?", "40 meters"),
+    ('huiszwaluw', "How far away should a mud pool be?", "200 meters"),
+    ('spreeuw', "At what height should starling nest boxes be placed?", "2 to 5 meters"),
+    ('koolmees', "What is the minimum installation height for the boxes?", "2 meters"),
+    ('slechtvalk', "How many nest boxes per neighborhood are recommended?", "one"),
+    ('zwarte roodstaart', "What is an ideal habitat for black redstarts?", "brown roofs"),
+    ('egel', "What do hedgehogs primarily feed on?", "insects"),
+    ('eekhoorn', "What can be installed to give squirrels safe passage?", "squirrel bridges"),
+    ('amfibieën', "How deep should the ponds be?", "1.5 meters"),
+]
+
+
+# Size of the model weights in bytes, as they would be saved to disk
+def model_size(qa_pipeline):
+    import torch
+    buffer = io.BytesIO()
+    torch.save(qa_pipeline.model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def run(quantize, animal_index, repeat):
+    start = time.perf_counter()
+    qa_pipeline = build_pipeline(quantize)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    correct = 0
+    for animal, question, expected in QUESTIONS:
+        context = animal_index[animal]
+        for _ in range(repeat):
+            start = time.perf_counter()
+            answer = qa_pipeline({'question': question, 'context': context})['answer']
+            latencies.append(time.perf_counter() - start)
+        correct += expected.lower() in answer.lower()
+
+    return {
+        'mode': 'int8' if quantize else 'float32',
+        'load_seconds': load_seconds,
+        'size_mb': model_size(qa_pipeline) / 1024 / 1024,
+        'median_ms': statistics.median(latencies) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'correct': correct,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare accuracy and latency of the full-precision and quantized chatbot model.")
+    parser.add_argument('--document', default=ANIMALS_DOCUMENT, help="animal document the questions are about")
+    parser.add_argument('--repeat', type=int, default=3, help="times every question is asked, for stable timings")
+    args = parser.parse_args(argv)
+
+    animal_index = load_animal_index(args.document)
+    print(f"{'mode':<8} {'load (s)':>9} {'size (MB)':>10} {'median (ms)':>12} {'mean (ms)':>10} {'correct':>8}")
+    for quantize in (False, True):
+        result = run(quantize, animal_index, args.repeat)
+        print(f"{result['mode']:<8} {result['load_seconds']:>9.1f} {result['size_mb']:>10.1f} "
+              f"{result['median_ms']:>12.1f} {result['mean_ms']:>10.1f} {result['correct']:>5}/{len(QUESTIONS)}")
+
+
+if __name__ == '__main__':
+    main()
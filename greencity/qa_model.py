@@ -0,0 +1,112 @@
+import os
+import threading
+
+from greencity.batching import MicroBatcher
+
+# Question-answering model of the Animal Chatbot, one per process.
+#
+# Loading DistilBERT takes from seconds up to a minute, so it is loaded in a
+# background thread started by warm_up(). The main page calls warm_up() when
+# the app opens, so the model is usually ready before anyone asks a question.
+# Until then answer() returns None and the chatbot shows the full animal
+# section instead. All sessions share the loaded pipeline.
+#
+# Questions from all sessions go through one MicroBatcher, so questions
+# asked at the same moment run as one padded batch instead of competing
+# single forward passes.
+#
+# On CPU-only servers the model can be loaded with its linear layers
+# quantized to int8 (torch dynamic quantization) to reduce its memory and
+# CPU time. Measure the gain and the accuracy cost on the target server with
+# `python -m greencity.qa_benchmark` before enabling it.
+
+QA_MODEL = "distilbert-base-cased-distilled-squad"
+
+# Set GREENCITY_QA_QUANTIZE=1 to use the int8 quantized model
+QUANTIZE = os.environ.get('GREENCITY_QA_QUANTIZE', '').lower() in ('1', 'true', 'yes')
+
+# Seconds a question waits for its answer before giving up
+ANSWER_TIMEOUT = 60
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_thread = None
+_pipeline = None
+_batcher = None
+_error = None
+
+
+# Answer a batch of (question, context) pairs with one pipeline call
+def _answer_batch(items):
+    questions = [question for question, context in items]
+    contexts = [context for question, context in items]
+    results = _pipeline(question=questions, context=contexts, batch_size=len(items))
+    if isinstance(results, dict):  # the pipeline unwraps batches of one
+        results = [results]
+    return [result.get('answer') for result in results]
+
+
+# Create the question-answering pipeline, optionally with int8 quantized linear layers
+def build_pipeline(quantize=False):
+    from transformers import pipeline
+    if not quantize:
+        return pipeline("question-answering", model=QA_MODEL)
+
+    import torch
+    qa_pipeline = pipeline("question-answering", model=QA_MODEL, framework='pt', device='cpu')
+    qa_pipeline.model = torch.ao.quantization.quantize_dynamic(qa_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return qa_pipeline
+
+
+def _load():
+    global _pipeline, _batcher, _error
+    try:
+        qa_pipeline = build_pipeline(QUANTIZE)
+        # One small question so the first real question does not pay for lazy initialization
+        qa_pipeline({'question': "What is this?", 'context': "This is a warm-up."})
+        # The batcher must exist before answer() sees the pipeline
+        _batcher = MicroBatcher(_answer_batch, name="qa-model-batcher")
+        _pipeline = qa_pipeline
+    except Exception as e:
+        _error = e
+    finally:
+        _ready.set()
+
+
+# Start loading the model in the background; later calls do nothing
+def warm_up():
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_load, name="qa-model-warm-up", daemon=True)
+            _thread.start()
+
+
+# 'loading', 'ready' or 'failed'
+def status():
+    if not _ready.is_set():
+        return 'loading'
+    return 'ready' if _pipeline is not None else 'failed'
+
+
+# Error that stopped the model from loading, or None
+def load_error():
+    return _error
+
+
+# The shared pipeline, or None while it is loading or when loading failed.
+# Waits at most `timeout` seconds for the model to finish loading.
+def get_pipeline(timeout=0):
+    warm_up()
+    _ready.wait(timeout)
+    return _pipeline
+
+
+# Answer a question from the context, or None when the model is not available.
+# The question is answered together with those of other sessions asked at the
+# same moment. Errors of the model itself, and TimeoutError when no answer
+# comes within `answer_timeout` seconds, are raised to the caller.
+def answer(question, context, timeout=0, answer_timeout=ANSWER_TIMEOUT):
+    if get_pipeline(timeout) is None or _batcher is None:
+        return None
+    return _batcher((question, context), timeout=answer_timeout)
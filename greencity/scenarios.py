@@ -0,0 +1,92 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from greencity.cache import derived
+
+# Planning model of the Urban Planning Dashboard.
+#
+# Changing the share of public green space in a neighborhood changes its air
+# quality, temperature and, because the rest of the area is housing, its
+# population density. The formulas work on NumPy arrays, so the model can be
+# evaluated for many neighborhoods and green levels at once.
+
+# All green space percentages a scenario can use
+GREEN_LEVELS = np.arange(101)
+
+
+def air_quality_index(green):
+    return 50 - 0.3 * np.asarray(green, dtype=float)
+
+
+def temperature(green):
+    return 30 - 0.2 * np.asarray(green, dtype=float)
+
+
+# Population density given the housing share of the area; NaN when there is no housing left
+def population_density(population, housing):
+    population = np.asarray(population, dtype=float)
+    housing = np.asarray(housing, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(housing > 0, population / housing * 2, np.nan)
+
+
+# Evaluate the model for arrays of scenarios, one green space percentage and
+# population per scenario. Returns a dict of arrays with one value per scenario.
+def evaluate(green, population):
+    green = np.asarray(green, dtype=float)
+    if np.any(np.isnan(green) | (green < GREEN_LEVELS[0]) | (green > GREEN_LEVELS[-1])):
+        raise ValueError("Green space must be a number between 0 and 100%")
+    housing = 100 - green
+    return {
+        'housing': housing,
+        'aqi': air_quality_index(green),
+        'temperature': temperature(green),
+        'density': population_density(population, housing),
+    }
+
+
+# Outcome of every green level for every neighborhood.
+# Each matrix has one row per neighborhood and one column per entry of GREEN_LEVELS.
+class ScenarioTable(NamedTuple):
+    aqi: np.ndarray
+    temperature: np.ndarray
+    density: np.ndarray
+
+    # Look up the outcome for one green percentage per neighborhood.
+    # Percentages between two levels are interpolated linearly.
+    def at(self, green):
+        rows = np.arange(self.aqi.shape[0])
+        green = np.clip(np.asarray(green, dtype=float), GREEN_LEVELS[0], GREEN_LEVELS[-1])
+        low = np.floor(green).astype(int)
+        high = np.minimum(low + 1, GREEN_LEVELS[-1])
+        weight = green - low
+
+        def lookup(matrix):
+            low_values, high_values = matrix[rows, low], matrix[rows, high]
+            # Density is undefined at 100% green; just below it, use the last defined level
+            high_values = np.where(np.isnan(high_values), low_values, high_values)
+            return low_values * (1 - weight) + high_values * weight
+
+        return lookup(self.aqi), lookup(self.temperature), lookup(self.density)
+
+
+def _build_scenario_table(gdf):
+    green = GREEN_LEVELS[np.newaxis, :]
+    population = gdf['Population'].to_numpy(dtype=float)[:, np.newaxis]
+    shape = (len(gdf), len(GREEN_LEVELS))
+    return ScenarioTable(
+        aqi=np.broadcast_to(air_quality_index(green), shape).copy(),
+        temperature=np.broadcast_to(temperature(green), shape).copy(),
+        density=population_density(population, 100 - green),
+    )
+
+
+# Scenario table of the neighborhoods, computed once per shared GeoDataFrame
+def scenario_table(gdf):
+    return derived(gdf, 'scenario_table', _build_scenario_table)
+
+
+# Green share of every neighborhood after adding `change` percentage points everywhere
+def greening_policy(current_green, change):
+    return np.clip(np.asarray(current_green, dtype=float) + change, GREEN_LEVELS[0], GREEN_LEVELS[-1])
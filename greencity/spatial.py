@@ -0,0 +1,76 @@
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+
+from greencity.cache import derived
+
+# Spatial structures over the neighborhood polygons.
+#
+# All of them are built from one STRtree (R-tree) per GeoDataFrame, so finding
+# the polygons near a polygon never needs a pairwise test against every other
+# polygon. They are computed once per shared GeoDataFrame.
+
+# Polygons closer than this many degrees (about 1 meter) count as neighbors,
+# so tiny gaps between the borders in the source data don't break adjacency
+ADJACENCY_TOLERANCE = 0.00001
+
+
+def _build_tree(gdf):
+    return shapely.STRtree(np.asarray(gdf.geometry))
+
+
+# R-tree over the polygons of the GeoDataFrame, in row order
+def spatial_index(gdf):
+    return derived(gdf, 'strtree', _build_tree)
+
+
+# Row of the polygon containing the point (longitude, latitude), or None outside all polygons.
+# Uses the R-tree, so only the few polygons whose bounding box contains the point are tested.
+def locate(gdf, lon, lat):
+    rows = spatial_index(gdf).query(shapely.Point(lon, lat), predicate='intersects')
+    if len(rows) == 0:
+        return None
+    return int(rows.min())
+
+
+# Neighborhood adjacency as compressed sparse rows: the neighbors of row i are
+# targets[offsets[i]:offsets[i + 1]], and sources holds the row of every edge.
+class AdjacencyGraph(NamedTuple):
+    offsets: np.ndarray
+    sources: np.ndarray
+    targets: np.ndarray
+
+    def neighbors(self, row):
+        return self.targets[self.offsets[row]:self.offsets[row + 1]]
+
+    def degrees(self):
+        return np.diff(self.offsets)
+
+
+def _build_adjacency(gdf):
+    geometries = np.asarray(gdf.geometry)
+    sources, targets = spatial_index(gdf).query(geometries, predicate='dwithin', distance=ADJACENCY_TOLERANCE)
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    order = np.lexsort((targets, sources))
+    sources, targets = sources[order], targets[order]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=len(geometries)))])
+    return AdjacencyGraph(offsets, sources, targets)
+
+
+# Adjacency graph of the neighborhoods
+def adjacency_graph(gdf):
+    return derived(gdf, 'adjacency_graph', _build_adjacency)
+
+
+# Add `factor` times the average change of its neighbors to the change of every
+# neighborhood, for all neighborhoods at once (a row-normalized spatial lag).
+# Returns the change including the spillover.
+def with_spillover(change, graph, factor):
+    change = np.asarray(change, dtype=float)
+    if factor == 0:
+        return change
+    received = np.bincount(graph.sources, weights=change[graph.targets], minlength=len(change))
+    degrees = graph.degrees()
+    return change + factor * np.divide(received, degrees, out=np.zeros_like(received), where=degrees > 0)
@@ -0,0 +1,71 @@
+import argparse
+import io
+import os
+
+from PIL import Image
+
+from greencity import data
+from greencity.measures import MEASURES_JSON, load_measures
+
+# Grid-sized thumbnails for the Nature Inclusive Measures page.
+#
+# The measure images are 1024x1024, but the grid shows them a few hundred
+# pixels wide. Thumbnails are generated once per image version into
+# data/.cache and kept in memory by the shared data layer, so reruns read
+# nothing from disk. Streamlit serves image bytes under a URL derived from
+# their content, so the URL of a thumbnail stays the same across reruns and
+# sessions and the browser can cache it.
+#
+# Usage (optional, the page generates missing thumbnails as well):
+#   python -m greencity.thumbnails
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_QUALITY = 80
+
+
+# The image scaled down to fit THUMBNAIL_SIZE, as WebP bytes
+def make_thumbnail(image_path, size=THUMBNAIL_SIZE):
+    with Image.open(image_path) as image:
+        image.thumbnail(size)
+        buffer = io.BytesIO()
+        image.save(buffer, format='WEBP', quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+
+def _read_thumbnail(image_path):
+    thumbnail_path = data.cache_path(image_path, '.thumb.webp')
+    if os.path.exists(thumbnail_path):
+        with open(thumbnail_path, 'rb') as file:
+            return file.read()
+
+    thumbnail = make_thumbnail(image_path)
+
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as file:
+            file.write(thumbnail)
+
+    try:
+        data.write_cache_file(thumbnail_path, write)
+    except OSError:
+        pass  # read-only checkout: keep working from memory
+    return thumbnail
+
+
+# Thumbnail bytes of an image, shared by all sessions and regenerated when the image changes
+def load_thumbnail(image_path):
+    return data.load(image_path, _read_thumbnail)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the thumbnails of the nature-inclusive measure images.")
+    parser.add_argument('--measures', default=MEASURES_JSON, help="measures JSON file listing the images")
+    args = parser.parse_args(argv)
+
+    items = load_measures(args.measures)
+    for item in items:
+        load_thumbnail(item["image"])
+    print(f"Generated thumbnails for {len(items)} measures in {data.CACHE_DIR}")
+
+
+if __name__ == '__main__':
+    main()
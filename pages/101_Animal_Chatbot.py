@@ -1,61 +1,21 @@
 import streamlit as st
-import re
-from transformers import pipeline
+
+from greencity import qa_model
+from greencity.chatbot import answer_cache, load_alias_index, load_animal_index, load_passage_index, normalize_question
 
 st.set_page_config(page_title="Nature-Inclusive Construction Chatbot", page_icon="🌿", layout="centered")
 ### st.title("🌿 Animal Information Chatbot for Nature-Inclusive Construction")
 
-# Initialize the Hugging Face question-answering pipeline
-qa_pipeline = pipeline("question-answering", model="distilbert-base-cased-distilled-squad")
-
-# Load the document content
-def load_document(filepath):
-    with open(filepath, 'r', encoding='utf-8') as file:
-        return file.read()
-
-# Build an index of animal sections in the document
-def build_document_index(document):
-    sections = re.split(r'\n\n', document)
-    animal_index = {}
-    for section in sections:
-        match = re.match(r'^([A-Z][a-zA-Zéëä\s]+)\s?\([^)]+\)', section.strip())
-        if match:
-            animal_name = match.group(1).strip().lower()
-            animal_index[animal_name] = section.strip()
-    return animal_index
-
-# Extract the animal name from the user's query (improved parsing)
-def extract_animal_name(query):
-    query = query.lower()
-    query = re.sub(r'[?.!]', '', query)  # Remove punctuation marks for better extraction
-    query = re.sub(r'\b(the|a|an)\b', '', query).strip()  # Remove articles for better extraction
-    if "about" in query:
-        return query.split("about")[-1].strip()
-    elif "tell me" in query:
-        return query.split("tell me")[-1].strip()
-    return query
-
-# Mapping of common animal names from English to Dutch
-animal_name_mapping = {
-    "squirrel": "eekhoorn",
-    "house martin": "huiszwaluw",
-    "starling": "spreeuw",
-    "great tit": "koolmees",
-    "blue tit": "koolmees",  # Redirect blue tit to great tit
-    "peregrine falcon": "slechtvalk",
-    "black redstart": "zwarte roodstaart",
-    "amphibians": "amfibieën",
-    "bees": "bijen",
-    "butterflies": "bijen",  # Redirect butterflies to bees (same text)
-    # Add more mappings as needed
-}
+# Start loading the shared question-answering model, if the main page has not done so yet
+qa_model.warm_up()
 
 # Path to your document
 document_path = "data/AnimalsTest.txt"
 
-# Load document content and build the index
-document_content = load_document(document_path)
-animal_index = build_document_index(document_content)
+# Load the indexes of the animal sections, animal names and passages, built once per process
+animal_index = load_animal_index(document_path)
+alias_index = load_alias_index(document_path)
+passage_index = load_passage_index(document_path)
 
 # Streamlit Interface - Enhancing the front-end
 ### Simona: set_page_config can only be used once
@@ -87,36 +47,60 @@ st.markdown("""
     - Bees
     - Butterflies
 """)
+if qa_model.status() == 'loading':
+    st.caption("The answer model is still loading. Until it is ready, questions are answered with the full information about the animal.")
+elif qa_model.status() == 'failed':
+    st.caption(f"The answer model could not be loaded ({qa_model.load_error()}). "
+               "Questions are answered with the full information about the animal.")
+
 # User input for the chatbot
 user_query = st.text_input("Type your question here:", "")
 
 if user_query:
-    # Extract the animal name from the user query
-    animal_name = extract_animal_name(user_query)
+    # Find the animal named in the query by its Dutch or English name, allowing for typos
+    animal_name = alias_index.find(user_query)
 
-    # Map the animal name from English to Dutch if available
-    if animal_name in animal_name_mapping:
-        animal_name = animal_name_mapping[animal_name].lower()
+    # Find the relevant section for the animal from the index; questions that don't
+    # name a known animal are answered from the best passages of the whole document
+    found_animal = animal_name is not None
+    section_key = animal_name if found_animal else None
 
-    # Find the relevant section for the animal from the index
-    if animal_name in animal_index:
-        animal_section = animal_index[animal_name]
+    if found_animal and ("about" in user_query or "tell me" in user_query):
+        response = f"Full information about {animal_name}:\n\n{animal_index[animal_name]}"
+    else:
+        passages = [passage.text for score, passage in passage_index.search(user_query, k=3, section=section_key)]
+        if found_animal:
+            fallback = f"Here is the full information about {animal_name}:\n\n{animal_index[animal_name]}"
+        else:
+            fallback = "Here are the most relevant parts of the document:\n\n" + "\n\n".join(passages)
 
-        # Use the QA model to answer specific questions within the animal section
-        if "about" in user_query or "tell me" in user_query:
-            response = f"Full information about {animal_name}:\n\n{animal_section}"
+        if not passages and not found_animal:
+            response = f"Sorry, no information found for '{user_query}'."
         else:
+            # Use the QA model to answer the question from the best passages only
+            context = " ".join(passages) if passages else animal_index[animal_name]
             try:
-                qa_result = qa_pipeline({
-                    'question': user_query,
-                    'context': animal_section
-                })
-                response = qa_result.get('answer', "Sorry, I couldn't find the specific information.")
+                # Repeated questions are answered from the cache shared by all sessions. It is
+                # only consulted once the model is ready, so its counters only count real lookups.
+                answer = None
+                if qa_model.status() == 'ready':
+                    cache = answer_cache(animal_index)
+                    cache_key = (normalize_question(user_query), section_key)
+                    answer = cache.get(cache_key)
+                    if answer is None:
+                        answer = qa_model.answer(user_query, context)
+                        if answer is not None:
+                            cache.put(cache_key, answer)
+                if answer is None and qa_model.status() == 'failed':
+                    response = f"The answer model could not be loaded. {fallback}"
+                elif answer is None:
+                    # The model is still loading
+                    response = f"The answer model is not available yet. {fallback}"
+                else:
+                    response = answer or "Sorry, I couldn't find the specific information."
             except Exception as e:
-                # If the QA model fails, fall back to showing the whole section
-                response = f"Sorry, an error occurred while trying to find the answer. Here is the full information about {animal_name}:\n\n{animal_section}"
-    else:
-        response = f"Sorry, no information found for '{animal_name}'."
+                # If the QA model fails, fall back to showing the whole section or the passages
+                response = f"Sorry, an error occurred while trying to find the answer. {fallback}"
 
     # Update session state to store only the last response
     st.session_state.conversation = [(user_query, response)]
@@ -127,3 +111,8 @@ if 'conversation' in st.session_state and st.session_state.conversation:
     st.markdown(f'**You:** {user_input}')
     st.markdown(f'**Chatbot:** {bot_response}')
 
+
+# Hit counters of the answer cache shared by all sessions, for monitoring
+cache_stats = answer_cache(animal_index).stats()
+st.caption(f"Answer cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+           f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} answers stored.")
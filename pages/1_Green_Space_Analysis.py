@@ -1,33 +1,52 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+
+from greencity.green_space import ROTTERDAM_POSTCODES, density_heatmap, downsample, load_postcode_index
 
 # Configure the app layout and style
 st.set_page_config(page_title="Green Space Analysis", layout='wide', initial_sidebar_state="expanded")
 
+# Sidebar layout
+st.sidebar.header("Urban Planning Tool")
+
+# The dataset covers all Dutch postal codes; by default only Rotterdam is shown
+with st.sidebar.expander("Region", expanded=False):
+    region = st.radio("Show postal codes of:", ["Rotterdam", "The Netherlands"])
+    if region == "The Netherlands":
+        chart_mode = st.radio("Chart:", ["All postal codes", "Density map", "Random sample"],
+                              help="The density map and the sample keep the chart fast for large datasets.")
+        if chart_mode == "Random sample":
+            sample_size = st.slider("Number of postal codes in the sample:", 100, 4000, 1000, step=100)
+    else:
+        chart_mode = "All postal codes"
+
+# Load the dataset as a postal code index, built once per process
+postcode_index = load_postcode_index()
+if region == "Rotterdam":
+    region_start, region_end = postcode_index.range(*ROTTERDAM_POSTCODES)
+else:
+    region_start, region_end = 0, len(postcode_index)
+region_postcodes = postcode_index.postcodes[region_start:region_end]
+region_name = "Rotterdam" if region == "Rotterdam" else "the Netherlands"
+
 # Page title and description
-st.title("🌳 Green Space Analysis in Rotterdam 🌆")
-st.markdown("""
+st.title(f"🌳 Green Space Analysis in {region_name} 🌆")
+st.markdown(f"""
 Welcome to the Green Space Analysis tool! 
-This application allows you to visualize the distribution of green in Rotterdam by postal code. 
+This application allows you to visualize the distribution of green in {region_name} by postal code. 
 You can adjust the green space values and compare different postcodes.
 """)
 
-# Load the dataset
-df_rotterdam = pd.read_csv('data/PC4_TreesBushesGrass.csv', delimiter=';')
-df_rotterdam = df_rotterdam[(df_rotterdam['Postcode'] >= 3000) & (df_rotterdam['Postcode'] <= 3099)]
-
 # Streamlit app starts here
 col1, col2 = st.columns([2, 1])  # Main column wider, sidebar narrower
 
-# Sidebar layout
-st.sidebar.header("Urban Planning Tool")
-
 # Expander for postcode selection
 with st.sidebar.expander("Postal code Selection", expanded=True):
-    selected_postcode_1 = st.selectbox("Select the first postal code:", df_rotterdam['Postcode'])
-    available_postcodes_2 = df_rotterdam.loc[df_rotterdam['Postcode'] != selected_postcode_1, 'Postcode']
-    selected_postcode_2 = st.selectbox("Select the second postal code (optional):", ['None'] + list(available_postcodes_2))
+    selected_postcode_1 = st.selectbox("Select the first postal code:", region_postcodes)
+    available_postcodes_2 = np.delete(region_postcodes, postcode_index.position(selected_postcode_1) - region_start)
+    selected_postcode_2 = st.selectbox("Select the second postal code (optional):", ['None'] + available_postcodes_2.tolist())
 
 with st.sidebar.expander("Surrounding postal code Selection", expanded=False):
     st.write(
@@ -38,37 +57,33 @@ with st.sidebar.expander("Surrounding postal code Selection", expanded=False):
     surrounding_count = st.slider(
         "Select number of surrounding postal codes to display:",
         min_value=0,
-        max_value=len(df_rotterdam),
+        max_value=len(region_postcodes),
         step=1,  # Change step to 1 for more granular control
-        value=len(df_rotterdam)  # Default value set to the total number of postcodes
+        value=len(region_postcodes)  # Default value set to the total number of postcodes
     )
 
-# Create a sorted list of unique postcodes
-sorted_postcodes = sorted(df_rotterdam['Postcode'].unique())
+# Positions of the selected postcode and the surrounding ones in the sorted index
+start_index, end_index = postcode_index.window(selected_postcode_1, surrounding_count, region_start, region_end)
 
-# Find the index of the selected postcode
-selected_index = sorted_postcodes.index(selected_postcode_1)
-
-# Calculate the start and end indices for surrounding postcodes
-start_index = max(selected_index - surrounding_count, 0)
-end_index = min(selected_index + surrounding_count + 1, len(sorted_postcodes))
-
-# Filter the DataFrame to include only the selected postcode and the surrounding ones
-surrounding_postcodes = sorted_postcodes[start_index:end_index]  # Remove .tolist()
-df_rotterdam = df_rotterdam[df_rotterdam['Postcode'].isin(surrounding_postcodes)]
-
-# print(len(df_filtered))
-
-# Filter the DataFrame based on selected postcodes
-df_filtered = df_rotterdam[df_rotterdam['Postcode'] != selected_postcode_1]
+# Rows of the surrounding postcodes without the selected ones, for the plot
+df_surrounding = postcode_index.frame(start_index, end_index)
+df_filtered = df_surrounding[df_surrounding['Postcode'] != selected_postcode_1]
 if selected_postcode_2 != 'None':
     df_filtered = df_filtered[df_filtered['Postcode'] != selected_postcode_2]
 
-selected_row_1 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_1]
-size_value_1 = float(selected_row_1['PercentageBushes'].values[0])
-selected_green_space_trees = int(selected_row_1['PercentageTrees'].values[0])
-selected_green_space_grass = int(selected_row_1['PercentageGrass'].values[0])
-selected_green_space_bushes = int(selected_row_1['PercentageBushes'].values[0])
+# Green space values of the selected postcodes
+selected_trees_1 = postcode_index.value(selected_postcode_1, 'PercentageTrees')
+selected_bushes_1 = postcode_index.value(selected_postcode_1, 'PercentageBushes')
+selected_grass_1 = postcode_index.value(selected_postcode_1, 'PercentageGrass')
+if selected_postcode_2 != 'None':
+    selected_trees_2 = postcode_index.value(selected_postcode_2, 'PercentageTrees')
+    selected_bushes_2 = postcode_index.value(selected_postcode_2, 'PercentageBushes')
+    selected_grass_2 = postcode_index.value(selected_postcode_2, 'PercentageGrass')
+
+size_value_1 = round(float(selected_bushes_1), 2)
+selected_green_space_trees = int(selected_trees_1)
+selected_green_space_grass = int(selected_grass_1)
+selected_green_space_bushes = int(selected_bushes_1)
 
 # Expander for adjusting green space
 with st.sidebar.expander(f"Adjust Green Space (Postal code: {selected_postcode_1})", expanded=False):
@@ -78,27 +93,36 @@ with st.sidebar.expander(f"Adjust Green Space (Postal code: {selected_postcode_1
 
 # Optional note at the bottom
 st.sidebar.markdown("---")
-st.sidebar.markdown("<small>**Note**: This tool is a prototype for visualizing greenness in Rotterdam. "
+st.sidebar.markdown(f"<small>**Note**: This tool is a prototype for visualizing greenness in {region_name}. "
                     "For detailed urban planning insights, please refer to official urban studies and databases.</small>", unsafe_allow_html=True)
 
 max_size = df_filtered['PercentageBushes'].max()
-# Create a Plotly scatter plot
-fig = px.scatter(df_filtered, x='PercentageTrees', y='PercentageGrass', 
-                 hover_name='Postcode', 
-                 size='PercentageBushes',
-                 size_max=max_size,
-                 title='Scatterplot of Green in Rotterdam',
-                 labels={'PercentageTrees': 'Trees (%)', 'PercentageBushes': 'Bushes (%)', 'PercentageGrass': 'Grass (%)'},                 
-                 color_discrete_sequence=['#00FF7F'])
+if chart_mode == "Density map":
+    # Only the binned counts are sent to the browser
+    fig = go.Figure(density_heatmap(df_filtered, 'PercentageTrees', 'PercentageGrass'))
+    fig.update_layout(title=f'Density of Green in {region_name}', xaxis_title='Trees (%)', yaxis_title='Grass (%)')
+else:
+    if chart_mode == "Random sample":
+        df_filtered = downsample(df_filtered, sample_size)
+    # Create a Plotly scatter plot, drawn with WebGL when all postal codes of the country are shown
+    fig = px.scatter(df_filtered, x='PercentageTrees', y='PercentageGrass', 
+                     hover_name='Postcode', 
+                     hover_data={'PercentageTrees': ':.2f', 'PercentageBushes': ':.2f', 'PercentageGrass': ':.2f'},
+                     size='PercentageBushes',
+                     size_max=max_size,
+                     title=f'Scatterplot of Green in {region_name}',
+                     labels={'PercentageTrees': 'Trees (%)', 'PercentageBushes': 'Bushes (%)', 'PercentageGrass': 'Grass (%)'},                 
+                     color_discrete_sequence=['#00FF7F'],
+                     render_mode='webgl' if region != "Rotterdam" else 'auto')
 
 # Highlight the first selected postcode
 st.write(size_value_1)
 
-fig.add_scatter(x=[selected_row_1['PercentageTrees'].values[0]], y=[selected_row_1['PercentageGrass'].values[0]], 
+fig.add_scatter(x=[selected_trees_1], y=[selected_grass_1], 
                  mode='markers', 
                  marker=dict(color='red', size=size_value_1, line=dict(width=2, color='red')),
                  name=f'Original Postal Code: {selected_postcode_1}',
-                 hovertemplate=f'{selected_postcode_1}<br>Tree Coverage: {selected_row_1["PercentageTrees"].values[0]}%<br>Bush Coverage: {selected_row_1["PercentageBushes"].values[0]}%<br>Grass Coverage: {selected_row_1["PercentageGrass"].values[0]}%')
+                 hovertemplate=f'{selected_postcode_1}<br>Tree Coverage: {selected_trees_1}%<br>Bush Coverage: {selected_bushes_1}%<br>Grass Coverage: {selected_grass_1}%')
 
 # If new green space values are adjusted, add them to the plot
 if (new_green_space_trees != selected_green_space_trees or 
@@ -113,18 +137,17 @@ if (new_green_space_trees != selected_green_space_trees or
 
 # If a second postcode is selected, highlight it
 if selected_postcode_2 != 'None':
-    selected_row_2 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_2]
-    size_value_2 = float(selected_row_2['PercentageBushes'].values[0])
+    size_value_2 = round(float(selected_bushes_2), 2)
     
-    fig.add_scatter(x=[selected_row_2['PercentageTrees'].values[0]], y=[selected_row_2['PercentageGrass'].values[0]], 
+    fig.add_scatter(x=[selected_trees_2], y=[selected_grass_2], 
                      mode='markers', 
                      marker=dict(color='orange', size=size_value_2, line=dict(width=2, color='orange')),
                      name=f'Original Postal Code: {selected_postcode_2}',
-                     hovertemplate=f'{selected_postcode_2}<br>Tree Coverage: {selected_row_2["PercentageTrees"].values[0]}%<br>Bush Coverage: {selected_row_2["PercentageBushes"].values[0]}%<br>Grass Coverage: {selected_row_2["PercentageGrass"].values[0]}%')
+                     hovertemplate=f'{selected_postcode_2}<br>Tree Coverage: {selected_trees_2}%<br>Bush Coverage: {selected_bushes_2}%<br>Grass Coverage: {selected_grass_2}%')
 
 # Update layout to improve clarity
 fig.update_layout(xaxis=dict(range=[0, 100]), yaxis=dict(range=[0, 100]), showlegend=True)
-fig.update_traces(marker=dict(opacity=0.7))
+fig.update_traces(marker=dict(opacity=0.7), selector=lambda trace: trace.type != 'heatmap')
 
 with col1:
     # Display the plot in Streamlit
@@ -134,51 +157,33 @@ with col2:
     # Dynamic statistics section
     st.header("Statistics")
     
-    # Overall statistics for Rotterdam
-    avg_trees = df_rotterdam['PercentageTrees'].mean()
-    avg_bushes = df_rotterdam['PercentageBushes'].mean()
-    avg_grass = df_rotterdam['PercentageGrass'].mean()
+    # Overall statistics for the surrounding postcodes, from the prefix sums of the index
+    avg_trees = postcode_index.mean('PercentageTrees', start_index, end_index)
+    avg_bushes = postcode_index.mean('PercentageBushes', start_index, end_index)
+    avg_grass = postcode_index.mean('PercentageGrass', start_index, end_index)
 
     total_avg = avg_trees + avg_bushes + avg_grass
 
-    # Dynamic statistics based on selected postcodes
-    selected_postcodes = [selected_postcode_1]
-    if selected_postcode_2 != 'None':
-        selected_postcodes.append(selected_postcode_2)
-
-    avg_selected_trees = df_rotterdam[df_rotterdam['Postcode'].isin(selected_postcodes)]['PercentageTrees'].mean()
-    avg_selected_bushes = df_rotterdam[df_rotterdam['Postcode'].isin(selected_postcodes)]['PercentageBushes'].mean()
-    avg_selected_grass = df_rotterdam[df_rotterdam['Postcode'].isin(selected_postcodes)]['PercentageGrass'].mean()
-
-    # Get green space values for both selected postcodes
-    selected_trees_1 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_1, 'PercentageTrees'].values[0]
-    selected_bushes_1 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_1, 'PercentageBushes'].values[0]
-    selected_grass_1 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_1, 'PercentageGrass'].values[0]
     green_space_1 = selected_bushes_1 + selected_grass_1 + selected_trees_1
 
-    if selected_postcode_2 != 'None':
-        selected_trees_2 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_2, 'PercentageTrees'].values[0]
-        selected_bushes_2 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_2, 'PercentageBushes'].values[0]
-        selected_grass_2 = df_rotterdam.loc[df_rotterdam['Postcode'] == selected_postcode_2, 'PercentageGrass'].values[0]
-
     # Provide insights based on averages for the first postcode
     if green_space_1 > total_avg:
-        st.success("🌳 The selected postal code has a higher average of green than the overall average in Rotterdam. ")
+        st.success(f"🌳 The selected postal code has a higher average of green than the overall average in {region_name}. ")
     elif green_space_1 < total_avg:
-        st.warning("🌳 The selected postal code has a lower average of green than the overall average in Rotterdam. ")
+        st.warning(f"🌳 The selected postal code has a lower average of green than the overall average in {region_name}. ")
     else:
-        st.info("🌳 The selected postal code has the same average of green as the overall average in Rotterdam. ")
+        st.info(f"🌳 The selected postal code has the same average of green as the overall average in {region_name}. ")
 
     # Additional insights if a second postcode is selected
     if selected_postcode_2 != 'None':
         green_space_2 = selected_bushes_2 + selected_grass_2 + selected_trees_2
         st.markdown("### Comparison Between Selected Postcodes 📊")
         if green_space_1 > green_space_2:
-            st.success(f"Postal code {selected_postcode_1} has a **higher green space** of **{green_space_1}%** compared to postcode {selected_postcode_2} with **{green_space_2}%**.")
+            st.success(f"Postal code {selected_postcode_1} has a **higher green space** of **{green_space_1:.2f}%** compared to postcode {selected_postcode_2} with **{green_space_2:.2f}%**.")
         elif green_space_1 < green_space_2:
-            st.warning(f"Postal code {selected_postcode_1} has a **lower green space** of **{green_space_1}%** compared to postcode {selected_postcode_2} with **{green_space_2}%**.")
+            st.warning(f"Postal code {selected_postcode_1} has a **lower green space** of **{green_space_1:.2f}%** compared to postcode {selected_postcode_2} with **{green_space_2:.2f}%**.")
         else:
-            st.info(f"Both postal codes have the **same green space** of **{green_space_1}%**.")
+            st.info(f"Both postal codes have the **same green space** of **{green_space_1:.2f}%**.")
 
         # Add insights about the impact of changes based on comparison
         st.markdown("### Opportunities for Improvement 🌱")
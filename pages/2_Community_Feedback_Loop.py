@@ -1,22 +1,14 @@
-import pandas as pd
-import streamlit as st
-
-if 'users' not in st.session_state:
-    st.session_state.users = pd.DataFrame(columns=['username', 'email', 'password', 'is_admin'])
+import io
+import math
 
-    # Create data for the admin user and a non-super user for demo
-    users = pd.DataFrame([
-        {'username': 'admin', 'email': 'admin@example.com', 'password': 'admin', 'is_admin': True},
-        {'username': 'user', 'email': 'user@example.com', 'password': 'user', 'is_admin': False}
-    ])
-
-    st.session_state.users = pd.concat([st.session_state.users, users], ignore_index=True)
+import streamlit as st
 
-if 'projects' not in st.session_state:
-    st.session_state.projects = pd.DataFrame(columns=['id', 'title', 'description', 'timeline', 'expected_impact'])
+from greencity.feedback_io import export_feedback, file_format, import_feedback, import_projects
+from greencity.feedback_store import PAGE_SIZE, empty_stats, open_store
 
-if 'feedback' not in st.session_state:
-    st.session_state.feedback = pd.DataFrame(columns=['project_id', 'username', 'rating', 'comment'])
+# Users, projects and feedback are stored in a database shared by all sessions
+# (the admin and user demo accounts are created with it)
+store = open_store()
 
 if 'current_user' not in st.session_state:
     st.session_state.current_user = None
@@ -24,16 +16,36 @@ if 'current_user' not in st.session_state:
 
 # Authentication functions
 def login(username, password):
-    user = st.session_state.users[
-        (st.session_state.users['username'] == username) &
-        (st.session_state.users['password'] == password)
-        ]
-    if not user.empty:
-        st.session_state.current_user = user.iloc[0]
+    user = store.login(username, password)
+    if user is not None:
+        st.session_state.current_user = user
         return True
     return False
 
 
+# Pagination of the project and feedback lists, newest first. The cursors of the
+# pages visited so far are kept in session state, so going back needs no query.
+def page_cursor(name):
+    return st.session_state.setdefault(f"{name}_cursors", [None])[-1]
+
+
+def page_navigation(name, next_cursor, total):
+    cursors = st.session_state[f"{name}_cursors"]
+    page_count = max(math.ceil(total / st.session_state.page_size), 1)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Newer", key=f"{name}_newer", disabled=len(cursors) == 1, on_click=cursors.pop)
+    col2.write(f"Page {len(cursors)} of {page_count} ({total} in total)")
+    with col3:
+        st.button("Older ▶", key=f"{name}_older", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
+
+
+# Start all lists at their first page again, e.g. when the page size changes
+def reset_pages():
+    for key in [key for key in st.session_state if str(key).endswith("_cursors")]:
+        del st.session_state[key]
+
+
 def logout():
     st.session_state.current_user = None
     st.session_state.page = "home"
@@ -93,7 +105,8 @@ def home_page():
             st.rerun()
 
     st.header("Ongoing Projects")
-    for _, project in st.session_state.projects.iterrows():
+    projects, next_cursor = store.projects_page(page_cursor("projects"), st.session_state.page_size)
+    for project in projects:
         st.subheader(project['title'])
         st.write(project['description'])
         if st.session_state.current_user is not None:
@@ -101,7 +114,7 @@ def home_page():
                 st.session_state.current_project = project['id']
                 st.session_state.page = "project_details"
                 st.rerun()
-
+    page_navigation("projects", next_cursor, store.count_projects())
 
 
 def login_page():
@@ -127,21 +140,14 @@ def submit_project_page():
     expected_impact = st.number_input("Expected Impact (e.g., expected reach or benefit level)", min_value=0, step=1)
 
     if st.button("Submit Project", key="submit_project_button"):
-        new_project = pd.DataFrame([{
-            'id': len(st.session_state.projects) + 1,
-            'title': title,
-            'description': description,
-            'timeline': timeline.strftime("%Y-%m-%d"),
-            'expected_impact': int(expected_impact)
-        }])
-        st.session_state.projects = pd.concat([st.session_state.projects, new_project], ignore_index=True)
+        store.add_project(title, description, timeline.strftime("%Y-%m-%d"), int(expected_impact))
         st.success("Project submitted successfully!")
         st.session_state.page = "home"
         st.rerun()
 
 
 def project_details_page():
-    project = st.session_state.projects[st.session_state.projects['id'] == st.session_state.current_project].iloc[0]
+    project = store.get_project(st.session_state.current_project)
     st.title(project['title'])
     st.write(f"Description: {project['description']}")
     st.write(f"Timeline: {project['timeline']}")
@@ -151,22 +157,19 @@ def project_details_page():
     rating = st.slider("Rating", 1, 5, 3)
     comment = st.text_area("Comment")
     if st.button("Submit Feedback", key="submit_feedback_button"):
-        new_feedback = pd.DataFrame([{
-            'project_id': project['id'],
-            'username': st.session_state.current_user['username'],
-            'rating': rating,
-            'comment': comment
-        }])
-        st.session_state.feedback = pd.concat([st.session_state.feedback, new_feedback], ignore_index=True)
+        store.add_feedback(project['id'], st.session_state.current_user['username'], rating, comment)
         st.success("Feedback submitted successfully!")
 
     st.header("Feedback")
-    project_feedback = st.session_state.feedback[st.session_state.feedback['project_id'] == project['id']]
-    for _, feedback in project_feedback.iterrows():
+    list_name = f"feedback_{project['id']}"
+    feedback_rows, next_cursor = store.feedback_page(project['id'], page_cursor(list_name), st.session_state.page_size)
+    for feedback in feedback_rows:
         st.write(f"User: {feedback['username']}")
         st.write(f"Rating: {feedback['rating']}/5")
         st.write(f"Comment: {feedback['comment']}")
         st.write("---")
+    # The number of feedback entries comes from the project's aggregates instead of counting rows
+    page_navigation(list_name, next_cursor, store.project_stats(project['id'])['count'])
 
 
 def dashboard_page():
@@ -178,28 +181,63 @@ def dashboard_page():
     assess engagement and make data-driven decisions.
     """)
 
-    for _, project in st.session_state.projects.iterrows():
+    bulk_data_section()
+
+    # Aggregates of all projects, maintained on every feedback insert
+    project_stats = store.all_project_stats()
+    for project in store.list_projects():
         with st.container():
             st.markdown(f"#### {project['title']}")
             st.write(f"*Description*: {project['description']}")
             st.write(f"*Timeline*: {project['timeline']}")
             st.write(f"*Expected Impact*: {project['expected_impact']}")
 
-            project_feedback = st.session_state.feedback[st.session_state.feedback['project_id'] == project['id']]
-            avg_rating = project_feedback['rating'].mean() if not project_feedback.empty else 0
-            feedback_count = len(project_feedback)
+            stats = project_stats.get(project['id'], empty_stats())
 
             # Display project metrics in a card-like format
             col1, col2 = st.columns(2)
-            col1.metric("Average Rating", f"{avg_rating:.2f}/5")
-            col2.metric("Number of Feedbacks", feedback_count)
+            col1.metric("Average Rating", f"{stats['average']:.2f}/5")
+            col2.metric("Number of Feedbacks", stats['count'])
+            if stats['count']:
+                st.caption("Ratings: " + " · ".join(f"{rating}★ {count}" for rating, count in stats['histogram'].items()))
 
             st.divider()
 
 
+# Import projects and feedback from files (e.g. paper surveys) and export feedback for analysts.
+# Files are processed in batches, so their size does not matter.
+def bulk_data_section():
+    with st.expander("Import and export"):
+        st.write("Projects need the columns title, description, timeline and expected_impact; "
+                 "feedback needs project_id, username, rating and comment.")
+        for kind, importer in [("projects", import_projects), ("feedback", import_feedback)]:
+            upload = st.file_uploader(f"Import {kind} (CSV or Parquet)", type=["csv", "parquet"], key=f"import_{kind}")
+            if upload is not None and st.button(f"Import {kind}", key=f"import_{kind}_button"):
+                try:
+                    count = importer(store, upload, file_format(upload.name))
+                    st.success(f"Imported {count} {kind}.")
+                except ValueError as e:
+                    st.error(f"Import stopped: {e}")
+
+        st.write("**Export feedback**")
+        st.caption("The file is built in the server's memory; for large exports use "
+                   "`python -m greencity.feedback_io export-feedback`, which writes it in batches.")
+        project_id = st.number_input("Project id (0 for all projects)", min_value=0, step=1, key="export_project")
+        export_format = st.radio("Format", ["csv", "parquet"], horizontal=True, key="export_format")
+        if st.button("Prepare export", key="export_button"):
+            # Built for this run only and not kept in session state, so the download always
+            # matches the chosen project and format and its memory is freed after the next rerun
+            buffer = io.BytesIO()
+            count = export_feedback(store, buffer, export_format, project_id or None)
+            st.download_button(f"Download {count} feedback entries", buffer.getvalue(),
+                               file_name=f"feedback.{export_format}", key="export_download")
+
+
 # Main app logic
 def main():
     st.sidebar.title("Navigation")
+    st.sidebar.selectbox("Items per page", [5, 10, 25, 50], index=[5, 10, 25, 50].index(PAGE_SIZE),
+                         key="page_size", on_change=reset_pages)
     if st.sidebar.button("Home", key="home_button"):
         st.session_state.page = "home"
     if st.session_state.current_user is None:
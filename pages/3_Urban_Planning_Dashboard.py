@@ -1,41 +1,68 @@
 import streamlit as st
-import pandas as pd
-import geopandas as gpd
 import folium
-from shapely.geometry import shape
 from streamlit_folium import st_folium
-import json
-import matplotlib
 
-# Load the enriched neighborhood data with geometries
-data_path = "data/Neighborhoods_Eindhoven.csv"  # Ensure the path is correct
-df = pd.read_csv(data_path)
-
-# Convert the 'geometry' column back to dictionary format if necessary
-df['geometry'] = df['geometry'].apply(json.loads)
-df['geometry'] = df['geometry'].apply(shape)
+from greencity.choropleth import add_choropleth, level_for_zoom, zoom_for_bounds
+from greencity.geometry_store import load_neighborhoods, map_geometries
+from greencity.scenarios import greening_policy, scenario_table
+from greencity.spatial import adjacency_graph, locate, with_spillover
 
-# Create a GeoDataFrame with the geometry column
-gdf = gpd.GeoDataFrame(df, geometry='geometry', crs='EPSG:4326')
+# Load the enriched neighborhood data with geometries.
+# The polygons are parsed once per process and shared by all sessions, so the
+# GeoDataFrame must not be modified here.
+data_path = "data/Neighborhoods_Eindhoven.csv"  # Ensure the path is correct
+gdf = load_neighborhoods(data_path)
 
 # Initial Instruction
-st.info("Welcome to the Urban Planning Dashboard! Start by selecting a neighborhood from the sidebar to explore and adjust urban planning scenarios in Eindhoven.")
+st.info("Welcome to the Urban Planning Dashboard! Start by selecting a neighborhood from the sidebar or clicking it on the map to explore and adjust urban planning scenarios in Eindhoven.")
+
+# A neighborhood clicked on the map during the previous run becomes the selected one
+if 'clicked_neighborhood' in st.session_state:
+    st.session_state.selected_neighborhood = st.session_state.pop('clicked_neighborhood')
 
 # Sidebar for selecting neighborhood and adjusting variables
 st.sidebar.title("🌿 Adjust Urban Parameters")
-selected_neighborhood = st.sidebar.selectbox('🏙️ Select a Neighborhood', gdf['Neighborhood'])
+selected_neighborhood = st.sidebar.selectbox('🏙️ Select a Neighborhood', gdf['Neighborhood'], key='selected_neighborhood')
+
+# Choose between adjusting one neighborhood and a greening policy for the whole city
+scenario_mode = st.sidebar.radio('🗺️ Scenario', ['Selected neighborhood', 'City-wide greening policy'])
 
 # Filter data for the selected neighborhood
 neighborhood_data = gdf[gdf['Neighborhood'] == selected_neighborhood].iloc[0]
-
-# Slider for adjusting green space and housing space
-green = st.sidebar.slider('🌳 Public Green Space (%)', 0, 100, int(neighborhood_data['G']))
+selected_row = int(gdf.index.get_loc(neighborhood_data.name))
+
+# Green space share of every neighborhood in the scenario
+green_values = gdf['G'].to_numpy(dtype=float)
+if scenario_mode == 'Selected neighborhood':
+    # Slider for adjusting green space and housing space
+    green = st.sidebar.slider('🌳 Public Green Space (%)', 0, 100, int(neighborhood_data['G']))
+    green_values = green_values.copy()
+    green_values[selected_row] = green
+else:
+    # One slider changes the green space of all neighborhoods at once
+    policy_change = st.sidebar.slider('🌳 Change in Public Green Space, all neighborhoods (%-points)', -50, 50, 0)
+    green_values = greening_policy(green_values, policy_change)
+    green = int(green_values[selected_row])
 housing = 100 - green
 st.sidebar.write(f'Housing Area: {housing}%')
 
-# Calculate updated AQI, temperature, and population density
-aqi = 50 - 0.3 * green
-temperature = 30 - 0.2 * green
+# Share of a neighborhood's change in green space that also benefits the neighborhoods next to it
+spillover = st.sidebar.slider('↔️ Spillover to Neighboring Areas', 0.0, 1.0, 0.0, step=0.05,
+                              help="0 treats every neighborhood as isolated. With 0.5, every neighborhood gains "
+                                   "half of the average change in green space of its neighbors as extra effective green space.")
+
+# Spread the changes over the adjacency graph of the neighborhoods
+neighbors = adjacency_graph(gdf)
+green_change = green_values - gdf['G'].to_numpy(dtype=float)
+effective_green_values = gdf['G'].to_numpy(dtype=float) + with_spillover(green_change, neighbors, spillover)
+
+# Look up the updated AQI, temperature and population density of every neighborhood
+# in the scenario table, which holds all outcomes for green space levels 0-100.
+# Spillover only improves air quality and temperature; density follows the actual housing area.
+aqi_values, temperature_values, _ = scenario_table(gdf).at(effective_green_values)
+_, _, density_values = scenario_table(gdf).at(green_values)
+aqi = aqi_values[selected_row]
+temperature = temperature_values[selected_row]
 
 # Get the current data for comparison
 current_aqi = neighborhood_data['AQI']
@@ -60,7 +87,7 @@ def format_change(value, current_value, is_higher_better):
 
 # Handle population density to avoid NaN
 if housing > 0:
-    density = (neighborhood_data['Population'] / housing) * 2
+    density = density_values[selected_row]
 else:
     density = "No Population"
 
@@ -72,13 +99,17 @@ st.markdown("""
     <hr>
             
     ### 🌳 How to Use This Dashboard:
-    **Step 1**: Select a neighborhood from the sidebar.
+    **Step 1**: Select a neighborhood from the sidebar, or click it on the map.
+    
+    Or choose the **City-wide greening policy** scenario to change the green space of all neighborhoods at once.
     
     **Step 2**: Adjust the **Public Green Space** slider to see how changing the green space affects:
       - 💨 **Air Quality Index (AQI)** – A lower AQI means cleaner air! The map color will adjust automatically based on air quality. Lower AQI leads to better air quality - 🟢, higher is worse 🔴.
       - 🌡️ **Temperature** – More green space can help cool the area!
       - 🏠 **Population Density** – Changes in housing area will impact population density.
 
+    **Step 3** (optional): Use the **Spillover** slider to let neighboring areas benefit from the extra green space too.
+
     ### 🔍 Data Sections:
     **📊 Current Data**: This section shows the existing conditions in your selected neighborhood.
     
@@ -101,42 +132,58 @@ st.markdown(f"**Estimated Air Quality Index:** {format_change(aqi, current_aqi,
 st.markdown(f"**Estimated Average Temperature:** {format_change(temperature, current_temperature, is_higher_better=False)} °C", unsafe_allow_html=True)
 st.markdown(f"**Estimated Population Density:** {format_change(density, current_density, is_higher_better=False)} people per square km", unsafe_allow_html=True)
 
-# Create a static map centered around Eindhoven with no reloads on zoom
+# Averages over all neighborhoods when the policy applies to the whole city
+if scenario_mode == 'City-wide greening policy':
+    st.markdown("### 🏙️ City-wide Averages:")
+    st.markdown(f"**Estimated Air Quality Index:** {format_change(aqi_values.mean(), gdf['AQI'].mean(), is_higher_better=False)} AQI", unsafe_allow_html=True)
+    st.markdown(f"**Estimated Average Temperature:** {format_change(temperature_values.mean(), gdf['T'].mean(), is_higher_better=False)} °C", unsafe_allow_html=True)
+
+# The map is split in two parts so slider changes don't reload it:
+# - the base map with the neighborhoods the slider doesn't affect, which only
+#   changes when another neighborhood or scenario is selected and then stays
+#   in the browser;
+# - a feature group with the affected neighborhoods, which st_folium swaps in
+#   place whenever their AQI colors or tooltips change.
+map_width, map_height = 700, 500
 m = folium.Map(location=[51.4416, 5.4697], zoom_start=12, control_scale=True, no_touch=True)
 
-# Define the AQI range for the color gradient
-min_aqi = 35
-max_aqi = 44
-
-# Function to generate color based on AQI
-def get_color(aqi_value):
-    norm = matplotlib.colors.Normalize(vmin=min_aqi, vmax=max_aqi)
-    cmap = matplotlib.cm.get_cmap('RdYlGn_r')
-    color = matplotlib.colors.to_hex(cmap(norm(aqi_value)))
-    return color
-
-# Update AQI value for the selected neighborhood in the GeoDataFrame
-gdf.loc[gdf['Neighborhood'] == selected_neighborhood, 'AQI'] = aqi
-
-# Highlight the selected neighborhood with a purple outline
-for _, row in gdf.iterrows():
-    style = {
-        'fillColor': get_color(row['AQI']),
-        'color': 'blue' if row['Neighborhood'] == selected_neighborhood else 'black',
-        'weight': 5 if row['Neighborhood'] == selected_neighborhood else 0.5,  # Thicker outline for the selected neighborhood
-        'fillOpacity': 0.7,
-    }
-    folium.GeoJson(
-        row['geometry'],
-        style_function=lambda x, style=style: style,
-        tooltip=folium.Tooltip(f"{row['Neighborhood']}: {row['AQI']:.2f} AQI"),
-    ).add_to(m)
-
-
-# Adjust map zoom to the selected neighborhood
-if selected_neighborhood:
-    bounds = gdf[gdf['Neighborhood'] == selected_neighborhood].geometry.bounds.values[0]
-    m.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
-
-# Display the static map
-st_folium(m, width=700, height=500)
+# The map zooms to the selected neighborhood. Pick the polygon detail level for that
+# zoom and only send the full-detail outline for the selected neighborhood itself.
+bounds = gdf.geometry.iloc[selected_row].bounds
+map_zoom = zoom_for_bounds(bounds, map_width, map_height)
+map_center = ((bounds[1] + bounds[3]) / 2, (bounds[0] + bounds[2]) / 2)
+detail_level = level_for_zoom(map_zoom)
+changed_geometries = map_geometries(gdf, detail_level, detailed_rows=[selected_row])
+
+if scenario_mode == 'Selected neighborhood':
+    # With spillover the slider also recolors the neighbors of the selected neighborhood
+    changed_rows = [selected_row]
+    if spillover > 0:
+        changed_rows += neighbors.neighbors(selected_row).tolist()
+    base_rows = [row for row in range(len(gdf)) if row not in changed_rows]
+else:
+    base_rows = []
+    changed_rows = range(len(gdf))
+
+if base_rows:
+    add_choropleth(m, gdf, gdf['AQI'], geometries=map_geometries(gdf, detail_level), rows=base_rows)
+
+# Color the affected neighborhoods and highlight the selected one with a blue outline
+changed_layer = folium.FeatureGroup(name="Scenario")
+add_choropleth(changed_layer, gdf, aqi_values, selected=selected_neighborhood,
+               geometries=changed_geometries, rows=changed_rows)
+
+# Display the map; center, zoom and the feature group are updated without re-rendering the base map
+map_output = st_folium(m, key="urban_planning_map", width=map_width, height=map_height, returned_objects=["last_clicked"],
+                       center=map_center, zoom=map_zoom, feature_group_to_add=changed_layer)
+
+# Select the neighborhood under a new click on the map. The map keeps returning its last click,
+# so remember which click was handled already.
+last_clicked = map_output.get("last_clicked") if map_output else None
+if last_clicked and last_clicked != st.session_state.get('handled_click'):
+    st.session_state.handled_click = last_clicked
+    clicked_row = locate(gdf, last_clicked['lng'], last_clicked['lat'])
+    if clicked_row is not None and clicked_row != selected_row:
+        # The selectbox already exists in this run, so change it at the start of the next one
+        st.session_state.clicked_neighborhood = gdf['Neighborhood'].iloc[clicked_row]
+        st.rerun()
@@ -1,27 +1,61 @@
+import math
+
 import streamlit as st
-import json
 
-# Load the JSON data
-with open("./data/youssef/json.json", "r") as file:
-    data = json.load(file)
-items = data["items"]
+from greencity.measures import load_measure_index
+from greencity.thumbnails import load_thumbnail
+
+# Load the search index over the measures, shared by all sessions
+measure_index = load_measure_index()
 
 st.set_page_config(page_title="Nature Inclusive Measures", layout='wide', initial_sidebar_state="expanded")
 
-# Sidebar filters for Category and Target Group
+# Number of measures per page of the grid (rows of 4)
+PAGE_SIZE = 12
+
+# The selected measure and the page of the grid are kept across reruns
+if 'selected_measure' not in st.session_state:
+    st.session_state.selected_measure = None
+if 'measures_page' not in st.session_state:
+    st.session_state.measures_page = 0
+
+# Sidebar filters for Category and Target Group, with the number of matching measures
 st.sidebar.header("Filter Options")
-available_categories = list(set([item["categories"] for item in items]))
-available_target_groups = list(set([group for item in items if "Target group" in item for group in item["Target group"]]))
+search_query = st.sidebar.text_input("Search descriptions and guidelines", "")
+search_results = measure_index.search(search_query)
+category_counts = measure_index.facet_counts(measure_index.categories, search_results)
+target_group_counts = measure_index.facet_counts(measure_index.target_groups, search_results)
+
+# The counts are shown below the options so the options stay the same and keep their selection
+selected_category = st.sidebar.selectbox("Select Category", ["All"] + list(category_counts))
+st.sidebar.caption(" · ".join(f"{category}: {count}" for category, count in category_counts.items()))
+selected_target_group = st.sidebar.selectbox("Select Target Group", ["All"] + list(target_group_counts))
+st.sidebar.caption(" · ".join(f"{group}: {count}" for group, count in target_group_counts.items()))
+
+# Filter items based on the search, the selected category and target group
+filtered_positions = measure_index.filter(
+    category=None if selected_category == "All" else selected_category,
+    target_group=None if selected_target_group == "All" else selected_target_group,
+    query=search_query)
 
-selected_category = st.sidebar.selectbox("Select Category", ["All"] + available_categories)
-selected_target_group = st.sidebar.selectbox("Select Target Group", ["All"] + available_target_groups)
+# Go back to the first page when the filters change
+filters = (search_query, selected_category, selected_target_group)
+if st.session_state.get('measures_filters') != filters:
+    st.session_state.measures_filters = filters
+    st.session_state.measures_page = 0
+page_count = max(math.ceil(len(filtered_positions) / PAGE_SIZE), 1)
+page = min(st.session_state.measures_page, page_count - 1)
 
-# Filter items based on selected category and target group
-filtered_items = [
-    item for item in items
-    if (selected_category == "All" or item["categories"] == selected_category) and
-       (selected_target_group == "All" or selected_target_group in item.get("Target group", []))
-]
+# Only the measures of the current page are looked up and drawn
+page_items = measure_index.select(filtered_positions[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+
+
+def select_measure(name):
+    st.session_state.selected_measure = name
+
+
+def change_page(step):
+    st.session_state.measures_page = page + step
 
 # Custom CSS for button styling
 st.markdown("""
@@ -68,18 +102,27 @@ with left_col:
     """, unsafe_allow_html=True)
     st.markdown("<hr style='border:1px solid gray;'>", unsafe_allow_html=True)
     
-    # Display the grid layout of items in a 4-column grid within the left column
-    selected_item_name = None
-    for i in range(0, len(filtered_items), 4):  # Loop through items with a step of 4 (one row per loop)
+    # Display the grid layout of the items on this page in a 4-column grid within the left column
+    for i in range(0, len(page_items), 4):  # Loop through items with a step of 4 (one row per loop)
         cols = st.columns(4)  # Create exactly 4 columns per row
-        for j, item in enumerate(filtered_items[i:i+4]):  # Populate the row with up to 4 items
+        for j, item in enumerate(page_items[i:i+4]):  # Populate the row with up to 4 items
             with cols[j]:
-                # Display the image in the column, ensuring a consistent size
-                st.image(item["image"], use_column_width=True)
+                # Display a small thumbnail in the column; the full image is only shown in the details
+                st.image(load_thumbnail(item["image"]), use_column_width=True)
                 
                 # Display the name of the item as a button
-                if st.button(item["name"], key=item["name"]):
-                    selected_item_name = item["name"]
+                st.button(item["name"], key=item["name"], on_click=select_measure, args=(item["name"],))
+
+    # Page navigation below the grid
+    if page_count > 1:
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("◀ Previous", key="measures_previous", disabled=page == 0, on_click=change_page, args=(-1,))
+        with page_col:
+            st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {page_count} "
+                        f"({len(filtered_positions)} measures)</p>", unsafe_allow_html=True)
+        with next_col:
+            st.button("Next ▶", key="measures_next", disabled=page == page_count - 1, on_click=change_page, args=(1,))
 
 # Add a vertical line between the columns
 with mid_col:
@@ -92,9 +135,11 @@ with mid_col:
 
 with right_col:
     # Show details for the selected item in the right column
-    if selected_item_name:
-        selected_item = next(item for item in items if item["name"] == selected_item_name)
+    selected_item_name = st.session_state.selected_measure
+    if selected_item_name in measure_index.by_name:
+        selected_item = measure_index.by_name[selected_item_name]
         st.header("Selected: " + selected_item["name"])
+        st.image(selected_item["image"], use_column_width=True)
 
         # Points
         st.subheader("Points")